@@ -0,0 +1,70 @@
+"""API da carteira de investimentos.
+
+create_app(config) monta o app Flask. Importar o pacote (jobs, bench, testes) não
+carrega Flask, rotas nem banco: tudo é importado e configurado dentro da factory.
+"""
+import importlib
+
+# Rotas da API: (url, módulo em app.resources, classe)
+ROTAS = (
+    ('/api/v1/carteira', 'carteira', 'CarteiraResource'),
+    ('/api/v1/carteira/eventos', 'eventos', 'EventosResource'),
+    ('/api/v1/carteira/search', 'busca', 'BuscaResource'),
+    ('/api/v1/carteira/<int:carteira_id>/serie', 'serie_diaria', 'SerieDiariaResource'),
+    ('/api/v1/carteira/<int:carteira_id>/saldo', 'saldo', 'SaldoResource'),
+    ('/api/v1/carteira/rentabilidade', 'rentabilidade', 'RentabilidadeResource'),
+    ('/api/v1/carteira/allocation', 'alocacao', 'AlocacaoResource'),
+    ('/api/v1/carteira/cotacoes', 'cotacoes', 'CotacoesResource'),
+    ('/api/v1/movimentacoes', 'movimentacoes', 'MovimentacoesResource'),
+    ('/api/v1/movimentacoes/lote', 'movimentacoes_lote', 'MovimentacoesLoteResource'),
+    ('/api/v1/movimentacoes/exportar', 'exportacao', 'ExportacaoResource'),
+    ('/api/v1/movimentacoes/operacoes/<int:operacao_id>', 'operacoes', 'OperacaoResource'),
+    ('/api/v1/pool', 'pool', 'PoolResource'),
+)
+
+
+def create_app(config=None):
+    """Cria o app Flask.
+
+    config: mapeamento com as chaves das variáveis de ambiente do banco (DB_PERFIL,
+    DATABASE_URL, DB_LOCAL_PATH, DB_POOL_*, DB_REPLICAS) e CORS_ORIGINS; o que faltar
+    vem do ambiente. Ex.: create_app({'DB_PERFIL': 'local', 'DB_LOCAL_PATH': ':memory:'}).
+    """
+    from flask import Flask
+    from flask_restful import Api
+    from flask_cors import CORS
+    from .config.database import configurar_banco, db
+    from .config.metrics import instrumentar
+    from .config.replicas import rotear
+
+    app = Flask(__name__)
+    app.config.from_mapping(config or {})
+    configurar_banco(app.config)
+    api = Api(app)
+
+    # Configuração do CORS
+    CORS(app, resources={r"/api/*": {"origins": app.config.get('CORS_ORIGINS', 'http://localhost:5173')}})
+
+    # Métricas por rota e por query, expostas em /metrics
+    instrumentar(app, db)
+
+    # Leituras (GET) nas réplicas configuradas em DB_REPLICAS; escritas no primário
+    rotear(app, db)
+
+    # Obter uma conexão do pool antes de cada requisição
+    @app.before_request
+    def connect_db():
+        db.connect(reuse_if_open=True)
+
+    # Devolver a conexão ao pool ao final da requisição (inclusive em caso de erro)
+    @app.teardown_request
+    def close_db(exc):
+        if not db.is_closed():
+            db.close()
+
+    # Registro das rotas (cada módulo de resources só é importado aqui)
+    for url, modulo, classe in ROTAS:
+        recurso = getattr(importlib.import_module(f'.resources.{modulo}', __name__), classe)
+        api.add_resource(recurso, url)
+
+    return app
@@ -0,0 +1,359 @@
+"""Modo ASGI: /api/v1/carteira e /api/v1/movimentacoes sobre asyncio.
+
+Mesmos contratos (parâmetros, corpos, códigos de status, ETag e Idempotency-Key)
+do app Flask em app.main, com as mesmas queries montadas pelo peewee, executadas
+num pool assíncrono do psycopg 3. Uma requisição esperando o banco não ocupa
+thread, então um processo mantém milhares de conexões HTTP abertas com um pool
+de ASYNC_POOL_MAX conexões ao Postgres.
+
+    uvicorn app.asgi:app --host 0.0.0.0 --port 8000 --workers 4
+"""
+import asyncio
+import functools
+import hashlib
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime
+from decimal import Decimal
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+from .config.async_database import criar_pool_assincrono, executar
+from .config.cache import MemoryCacheBackend, snapshot_cache
+from .config.database import logger
+from .models.carteira import Carteira
+from .models.carteira_diaria import insercao_saldo_diario
+from .models.eventos import SQL_EMITIR
+from .models.fila_movimentacoes import FilaMovimentacoes
+from .models.movimentacoes import Movimentacoes, quantizar
+from .resources.carteira import (
+    RESPOSTA_GET as CARTEIRA_GET, consulta_fundos, consulta_resumo, consulta_ultimas_movimentacoes,
+    formatar_evento_fundo, formatar_resumo, resposta_fundo, serializar_fundo, serializar_movimentacao, validar_fundo
+)
+from .resources.idempotencia import (
+    IDEMPOTENCIA_CACHE_MAX, IDEMPOTENCIA_ESPERA, IDEMPOTENCIA_HEADER, IDEMPOTENCIA_TTL,
+    avaliar, gravacao, liberacao, limpeza, limpeza_pendente, registro, reserva
+)
+from .resources.movimentacoes import (
+    FILA_MAX, MOVIMENTACOES_ASSINCRONO, atualizacao_saldo, consulta_movimentacoes, pagina_movimentacoes,
+    resposta_movimentacao, validar_movimentacao
+)
+from .resources.serializacao import lista
+import peewee
+
+_respostas = MemoryCacheBackend(IDEMPOTENCIA_CACHE_MAX)
+# Montagens do snapshot em andamento: requisições simultâneas esperam a mesma
+_montagens = {}
+
+
+async def _cache(metodo, *args):
+    # Com CACHE_BACKEND=redis cada chamada é uma ida ao Redis bloqueante: roda numa thread
+    # para não parar o event loop. O cache em memória é só um dict com lock
+    if isinstance(snapshot_cache.backend, MemoryCacheBackend):
+        return metodo(*args)
+    return await run_in_threadpool(metodo, *args)
+
+
+def _resposta(resultado):
+    # (corpo, status[, headers]) como no flask-restful
+    if isinstance(resultado, Response):
+        return resultado
+    corpo, status, *headers = resultado
+    return JSONResponse(corpo, status, headers[0] if headers else None)
+
+
+async def _dados(request):
+    try:
+        return await request.json()
+    except ValueError:
+        return None
+
+
+def idempotente(metodo):
+    """Versão assíncrona de resources.idempotencia.idempotente, na mesma tabela."""
+    @functools.wraps(metodo)
+    async def wrapper(request):
+        chave = request.headers.get(IDEMPOTENCIA_HEADER)
+        if not chave:
+            return await metodo(request)
+        if len(chave) > 255:
+            return {'error': f'{IDEMPOTENCIA_HEADER} excede o tamanho máximo de 255 caracteres'}, 400
+
+        pool = request.app.state.pool
+        rota = request.url.path
+        hash_requisicao = hashlib.sha256(await request.body()).hexdigest()
+        cache_key = f'{rota}:{chave}'
+
+        gravada = _respostas.get(cache_key)
+        if gravada is None and not await _reservar(pool, rota, chave, hash_requisicao):
+            gravada = await _aguardar(pool, rota, chave, hash_requisicao)
+            if gravada is not None and gravada[1] not in (None, 409):
+                _respostas.set(cache_key, gravada, IDEMPOTENCIA_TTL)
+
+        if gravada is not None:
+            hash_gravado, status, corpo, cabecalhos = gravada
+            if hash_gravado != hash_requisicao:
+                return {'error': f'{IDEMPOTENCIA_HEADER} já usada com outro corpo de requisição'}, 422
+            return corpo, status, {**cabecalhos, 'Idempotent-Replayed': 'true'}
+
+        # Chave reservada por esta requisição: processar normalmente
+        try:
+            resultado = await metodo(request)
+        except Exception:
+            await _executar(pool, liberacao(rota, chave))
+            raise
+        corpo, status, *cabecalhos = resultado
+        cabecalhos = dict(cabecalhos[0]) if cabecalhos else {}
+
+        if status >= 500:
+            # Erros do servidor não são gravados, para que a repetição tente de novo
+            await _executar(pool, liberacao(rota, chave))
+        else:
+            await _executar(pool, gravacao(rota, chave, status, corpo, cabecalhos))
+            _respostas.set(cache_key, (hash_requisicao, status, corpo, cabecalhos), IDEMPOTENCIA_TTL)
+        if limpeza_pendente():
+            # Chaves expiradas, de tempos em tempos
+            try:
+                await _executar(pool, limpeza())
+            except Exception as e:
+                logger.error(f"Erro na limpeza de chaves de idempotência: {str(e)}")
+        return resultado
+    return wrapper
+
+
+async def _executar(pool, query):
+    async with pool.connection() as conn:
+        return await executar(conn, query)
+
+
+async def _reservar(pool, rota, chave, hash_requisicao):
+    return bool(await _executar(pool, reserva(rota, chave, hash_requisicao)))
+
+
+async def _aguardar(pool, rota, chave, hash_requisicao):
+    # Como resources.idempotencia._aguardar, sem bloquear o loop durante a espera
+    prazo = time.monotonic() + IDEMPOTENCIA_ESPERA
+    espera = 0.02
+    while True:
+        gravado = await _executar(pool, registro(rota, chave))
+        if not gravado or gravado[0][3] < datetime.now():
+            if gravado:
+                await _executar(pool, liberacao(rota, chave, expirada=True))
+            if await _reservar(pool, rota, chave, hash_requisicao):
+                return None
+            continue
+        resultado = avaliar(gravado[0], hash_requisicao, prazo)
+        if resultado is not None:
+            return resultado
+        await asyncio.sleep(espera)
+        espera = min(espera * 2, 0.5)
+
+
+async def _evento_fundo(conn, carteira_id, now, movimentacao=None):
+    # Como resources.carteira.evento_fundo, na transação da escrita
+    fundo = (await executar(conn, consulta_fundos().where(Carteira.id == carteira_id)))[0]
+    tipo, dados = formatar_evento_fundo(fundo, movimentacao)
+    await executar(conn, (SQL_EMITIR, (tipo, dados, now)))
+
+
+async def _montar_carteira(pool):
+    async with pool.connection() as conn:
+        resumo = formatar_resumo((await executar(conn, consulta_resumo()))[0])
+        fundos = await executar(conn, consulta_fundos())
+        movimentacoes = await executar(conn, consulta_ultimas_movimentacoes())
+    return CARTEIRA_GET % (resumo, lista(serializar_fundo, fundos), lista(serializar_movimentacao, movimentacoes))
+
+
+async def _snapshot(nome, montar):
+    entry = await _cache(snapshot_cache.get, nome)
+    if entry is not None:
+        return entry
+
+    async def montar_e_guardar():
+        generation = await _cache(snapshot_cache.generation)
+        return await _cache(snapshot_cache.put, nome, generation, await montar())
+
+    tarefa = _montagens.get(nome)
+    if tarefa is None:
+        tarefa = _montagens[nome] = asyncio.ensure_future(montar_e_guardar())
+        tarefa.add_done_callback(lambda _: _montagens.pop(nome, None))
+    # shield: um cliente que desconecta não cancela a montagem dos outros
+    return await asyncio.shield(tarefa)
+
+
+async def carteira_get(request):
+    try:
+        # Snapshot serializado em cache, invalidado pelos POSTs (dos dois modos, com CACHE_BACKEND=redis)
+        snapshot = await _snapshot('carteira', lambda: _montar_carteira(request.app.state.pool))
+        etag = f'"{snapshot["etag"]}"'
+        headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+        if etag in [t.strip() for t in request.headers.get('if-none-match', '').split(',')]:
+            return Response(status_code=304, headers=headers)
+        return Response(snapshot['body'], media_type='application/json', headers=headers)
+
+    except Exception as e:
+        logger.error(f"Erro no GET /api/v1/carteira: {str(e)}")
+        return JSONResponse({'error': str(e)}, 500)
+
+
+@idempotente
+async def _post_carteira(request):
+    try:
+        data = await _dados(request)
+        erro = validar_fundo(data)
+        if erro:
+            return {'error': erro}, 400
+
+        now = datetime.now()
+        async with request.app.state.pool.connection() as conn:
+            async with conn.transaction():
+                id_ = (await executar(conn, Carteira.insert(
+                    nome=data['name'],
+                    ticker=data['ticker'],
+                    tipo=data['type'],
+                    valor_cota=data['quoteValue'],
+                    quantidade_cotas=0,
+                    valor_investido=0,
+                    criado_em=now,
+                    atualizado_em=now
+                ).returning(Carteira.id)))[0][0]
+
+                # Publicar o fundo novo para o stream de eventos (entregue no commit)
+                await _evento_fundo(conn, id_, now)
+
+        await _cache(snapshot_cache.invalidate)
+        return resposta_fundo(id_, data['name'], data['ticker'], data['type'], data['quoteValue'], now), 201
+
+    except Exception as e:
+        if 'unique constraint' in str(e).lower():
+            logger.error(f"Erro de integridade no POST /api/v1/carteira: {str(e)}")
+            return {'error': 'Ticker já existe'}, 400
+        logger.error(f"Erro no POST /api/v1/carteira: {str(e)}")
+        return {'error': str(e)}, 500
+
+
+async def carteira_post(request):
+    return _resposta(await _post_carteira(request))
+
+
+async def movimentacoes_get(request):
+    try:
+        try:
+            query, limite = consulta_movimentacoes(request.query_params)
+        except ValueError as e:
+            return JSONResponse({'error': str(e)}, 400)
+
+        async with request.app.state.pool.connection() as conn:
+            rows = await executar(conn, query)
+        return Response(pagina_movimentacoes(rows, limite), media_type='application/json')
+
+    except Exception as e:
+        logger.error(f"Erro no GET /api/v1/movimentacoes: {str(e)}")
+        return JSONResponse({'error': str(e)}, 500)
+
+
+@idempotente
+async def _post_movimentacoes(request):
+    try:
+        data = await _dados(request)
+        erro = validar_movimentacao(data)
+        if erro:
+            return {'error': erro}, 400
+
+        now = datetime.now()
+        hoje = now.date()
+        quantidade = quantizar(Decimal(str(data['quantidade'])))
+        valor = quantizar(Decimal(str(data['valor'])))
+        pool = request.app.state.pool
+
+        if MOVIMENTACOES_ASSINCRONO or 'respond-async' in request.headers.get('Prefer', ''):
+            return await _enfileirar(pool, data, quantidade, valor, now)
+
+        async with pool.connection() as conn:
+            async with conn.transaction():
+                saldo = await executar(conn, atualizacao_saldo(data['carteira_id'], data['tipo'], quantidade, valor, now))
+                if not saldo:
+                    # Nenhuma linha atualizada: carteira inexistente ou saldo insuficiente
+                    if not await executar(conn, Carteira.select(Carteira.id).where(Carteira.id == data['carteira_id'])):
+                        return {'error': 'Carteira não encontrada'}, 404
+                    return {'error': 'Quantidade de cotas insuficiente para resgate'}, 400
+                carteira_id, quantidade_cotas, valor_investido = saldo[0]
+
+                id_ = (await executar(conn, Movimentacoes.insert(
+                    carteira=carteira_id,
+                    data_operacao=hoje,
+                    tipo=data['tipo'],
+                    valor=valor,
+                    quantidade_cotas=quantidade,
+                    saldo_cotas=quantidade_cotas,
+                    saldo_investido=valor_investido,
+                    criado_em=now
+                ).returning(Movimentacoes.id)))[0][0]
+
+                # Saldo do dia na série histórica e evento para o stream (entregue no commit)
+                await executar(conn, insercao_saldo_diario([(carteira_id, quantidade_cotas, valor_investido)], hoje, now))
+                await _evento_fundo(conn, carteira_id, now, (id_, hoje, data['tipo'], quantizar(quantidade), quantizar(valor)))
+
+        await _cache(snapshot_cache.invalidate)
+        return resposta_movimentacao(id_, carteira_id, hoje, data['tipo'], valor, quantidade,
+                                     quantidade_cotas, valor_investido), 201
+
+    except Exception as e:
+        logger.error(f"Erro no POST /api/v1/movimentacoes: {str(e)}")
+        return {'error': str(e)}, 500
+
+
+async def _enfileirar(pool, data, quantidade, valor, now):
+    # Backpressure: recusar quando a fila já tem FILA_MAX operações pendentes
+    pendentes = (await _executar(pool, FilaMovimentacoes
+                                 .select(FilaMovimentacoes.id)
+                                 .where(FilaMovimentacoes.status == 'PENDENTE')
+                                 .limit(FILA_MAX)
+                                 .select_from(peewee.fn.COUNT(peewee.SQL('*')))))[0][0]
+    if pendentes >= FILA_MAX:
+        return {'error': 'Fila de movimentações cheia, tente novamente'}, 503, {'Retry-After': '5'}
+
+    try:
+        operacao_id, status = (await _executar(pool, FilaMovimentacoes.insert(
+            carteira=data['carteira_id'],
+            tipo=data['tipo'],
+            valor=valor,
+            quantidade_cotas=quantidade,
+            criado_em=now
+        ).returning(FilaMovimentacoes.id, FilaMovimentacoes.status)))[0]
+    except Exception as e:
+        if 'foreign key' in str(e).lower():
+            return {'error': 'Carteira não encontrada'}, 404
+        raise
+
+    status_url = f'/api/v1/movimentacoes/operacoes/{operacao_id}'
+    return {'operacao_id': operacao_id, 'status': status, 'status_url': status_url}, 202, {'Location': status_url}
+
+
+async def movimentacoes_post(request):
+    return _resposta(await _post_movimentacoes(request))
+
+
+@asynccontextmanager
+async def ciclo_de_vida(app):
+    app.state.pool = criar_pool_assincrono()
+    await app.state.pool.open()
+    try:
+        yield
+    finally:
+        await app.state.pool.close()
+
+
+app = Starlette(
+    routes=[
+        Route('/api/v1/carteira', carteira_get, methods=['GET']),
+        Route('/api/v1/carteira', carteira_post, methods=['POST']),
+        Route('/api/v1/movimentacoes', movimentacoes_get, methods=['GET']),
+        Route('/api/v1/movimentacoes', movimentacoes_post, methods=['POST']),
+    ],
+    middleware=[Middleware(CORSMiddleware, allow_origins=['http://localhost:5173'], allow_methods=['*'], allow_headers=['*'])],
+    lifespan=ciclo_de_vida
+)
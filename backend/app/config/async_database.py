@@ -0,0 +1,39 @@
+"""Pool assíncrono de conexões (psycopg 3) para o modo ASGI.
+
+Usa as mesmas credenciais do `db` e executa as queries montadas pelo peewee
+(`query.sql()`): o psycopg 3 aceita o mesmo estilo de parâmetros (%s) do psycopg2.
+"""
+import os
+from .database import db, POOL_TIMEOUT, POOL_RECYCLE, POOL_IDLE_TIMEOUT
+
+# Conexões mantidas abertas e máximo de conexões do pool assíncrono (por processo)
+ASYNC_POOL_MIN = int(os.environ.get('ASYNC_POOL_MIN', 4))
+ASYNC_POOL_MAX = int(os.environ.get('ASYNC_POOL_MAX', 20))
+
+
+def criar_pool_assincrono():
+    if db.perfil != 'postgres':
+        raise RuntimeError('O modo ASGI requer DB_PERFIL=postgres')
+    try:
+        from psycopg.conninfo import make_conninfo
+        from psycopg_pool import AsyncConnectionPool
+    except ImportError:
+        raise RuntimeError('O modo ASGI requer os pacotes psycopg e psycopg_pool instalados')
+    # Leituras em autocommit; escritas abrem conn.transaction()
+    return AsyncConnectionPool(
+        make_conninfo(dbname=db.database, **db.connect_params),
+        min_size=ASYNC_POOL_MIN,
+        max_size=ASYNC_POOL_MAX,
+        timeout=POOL_TIMEOUT,
+        max_lifetime=POOL_RECYCLE,
+        max_idle=POOL_IDLE_TIMEOUT,
+        kwargs={'autocommit': True},
+        open=False
+    )
+
+
+async def executar(conn, query):
+    """Executa uma query do peewee (ou uma tupla (sql, params)) e devolve as tuplas cruas."""
+    sql, params = query if isinstance(query, tuple) else query.sql()
+    cursor = await conn.execute(sql, params)
+    return await cursor.fetchall() if cursor.description else []
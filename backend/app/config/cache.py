@@ -0,0 +1,132 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+class MemoryCacheBackend:
+    """Cache LRU em memória, por processo, com TTL."""
+
+    def __init__(self, maxsize=128):
+        self._maxsize = maxsize
+        self._data = OrderedDict()
+        # Contadores ficam fora do LRU para nunca serem descartados
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key in self._counters:
+                return self._counters[key]
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at is not None and expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            expires_at = time.monotonic() + ttl if ttl else None
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self._maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def incr(self, key):
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+
+
+class RedisCacheBackend:
+    """Cache compartilhado entre workers (gunicorn) usando Redis."""
+
+    def __init__(self, url, prefix='merito:'):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError('CACHE_BACKEND=redis requer o pacote redis instalado')
+        self._client = redis.Redis.from_url(url)
+        self._prefix = prefix
+
+    def get(self, key):
+        value = self._client.get(self._prefix + key)
+        return json.loads(value) if value is not None else None
+
+    def set(self, key, value, ttl=None):
+        # Em milissegundos: TTLs abaixo de 1 s (ex.: CACHE_TTL=0.5) virariam ex=0, rejeitado pelo Redis
+        self._client.set(self._prefix + key, json.dumps(value), px=max(1, int(ttl * 1000)) if ttl else None)
+
+    def delete(self, key):
+        self._client.delete(self._prefix + key)
+
+    def incr(self, key):
+        return self._client.incr(self._prefix + key)
+
+
+class SnapshotCache:
+    """Guarda respostas serializadas com ETag, invalidadas por geração.
+
+    Cada escrita incrementa a geração; entradas montadas numa geração anterior
+    são ignoradas, então um GET concorrente com um POST nunca republica dados velhos.
+    """
+
+    GENERATION_KEY = 'snapshot:generation'
+
+    def __init__(self, backend, ttl=None):
+        self.backend = backend
+        self.ttl = ttl
+
+    def generation(self):
+        return int(self.backend.get(self.GENERATION_KEY) or 0)
+
+    def get(self, name):
+        entry = self.backend.get(f'snapshot:{name}')
+        if entry is None or entry['generation'] != self.generation():
+            return None
+        return entry
+
+    def get_or_build(self, name, builder):
+        entry = self.get(name)
+        if entry is not None:
+            return entry
+
+        generation = self.generation()
+        return self.put(name, generation, builder())
+
+    def put(self, name, generation, body):
+        """Guarda o corpo montado na geração lida antes de montá-lo (para builders assíncronos)."""
+        if not isinstance(body, str):
+            body = json.dumps(body)
+        entry = {
+            'generation': generation,
+            'etag': hashlib.sha1(body.encode('utf-8')).hexdigest(),
+            'body': body
+        }
+        self.backend.set(f'snapshot:{name}', entry, self.ttl)
+        return entry
+
+    def invalidate(self):
+        self.backend.incr(self.GENERATION_KEY)
+
+
+def create_cache_backend():
+    backend = os.environ.get('CACHE_BACKEND', 'memory')
+    if backend == 'redis':
+        return RedisCacheBackend(os.environ.get('CACHE_URL', 'redis://localhost:6379/0'))
+    if backend == 'memory':
+        return MemoryCacheBackend(int(os.environ.get('CACHE_MAXSIZE', 128)))
+    raise ValueError(f'CACHE_BACKEND desconhecido: {backend}')
+
+
+snapshot_cache = SnapshotCache(create_cache_backend(), ttl=float(os.environ.get('CACHE_TTL', 30)))
@@ -0,0 +1,98 @@
+import logging
+import os
+import queue
+import select
+import threading
+import time
+import psycopg2
+
+logger = logging.getLogger(__name__)
+
+# Eventos guardados por assinante antes de ele ser desconectado (volta com Last-Event-ID)
+EVENTOS_FILA_MAX = int(os.environ.get('EVENTOS_FILA_MAX', 1000))
+# Por quanto tempo (s) os eventos ficam na tabela para retomada
+EVENTOS_RETENCAO = int(os.environ.get('EVENTOS_RETENCAO', 86400))
+# Intervalo (s) entre limpezas da tabela de eventos
+EVENTOS_LIMPEZA = int(os.environ.get('EVENTOS_LIMPEZA', 3600))
+
+
+class OuvinteEventos:
+    """Repassa os NOTIFY de um canal a todos os assinantes deste processo.
+
+    Uma única conexão dedicada (fora do pool) fica em LISTEN numa thread; cada
+    assinante (um cliente SSE) recebe uma fila própria. Um assinante que deixa a
+    fila encher recebe None e deve reconectar, retomando pelo último id recebido.
+    """
+
+    def __init__(self, db, canal):
+        self._db = db
+        self._canal = canal
+        self._assinantes = set()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def assinar(self):
+        fila = queue.Queue(maxsize=EVENTOS_FILA_MAX)
+        with self._lock:
+            self._assinantes.add(fila)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._ouvir, name='ouvinte-eventos', daemon=True)
+                self._thread.start()
+        return fila
+
+    def cancelar(self, fila):
+        with self._lock:
+            self._assinantes.discard(fila)
+
+    def assinantes(self):
+        with self._lock:
+            return len(self._assinantes)
+
+    def _repassar(self, evento):
+        with self._lock:
+            assinantes = list(self._assinantes)
+        for fila in assinantes:
+            try:
+                fila.put_nowait(evento)
+            except queue.Full:
+                # Cliente lento: descarta o que acumulou e pede que reconecte
+                self._desconectar(fila)
+
+    def _desconectar(self, fila):
+        self.cancelar(fila)
+        with fila.mutex:
+            fila.queue.clear()
+        fila.put_nowait(None)
+
+    def _ouvir(self):
+        while True:
+            conn = None
+            try:
+                conn = psycopg2.connect(dbname=self._db.database, **self._db.connect_params)
+                conn.autocommit = True
+                conn.cursor().execute(f'LISTEN {self._canal}')
+                limpeza = -EVENTOS_LIMPEZA
+                while True:
+                    if time.monotonic() - limpeza > EVENTOS_LIMPEZA:
+                        conn.cursor().execute(
+                            "DELETE FROM eventos_carteira WHERE criado_em < now() - %s * interval '1 second'",
+                            (EVENTOS_RETENCAO,)
+                        )
+                        limpeza = time.monotonic()
+                    if select.select([conn], [], [], 5) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        id_, tipo, dados = conn.notifies.pop(0).payload.split('|', 2)
+                        self._repassar((int(id_), tipo, dados))
+            except Exception as e:
+                logger.warning(f"Ouvinte de eventos desconectado: {str(e)}")
+                # Eventos publicados até reconectar só são vistos por quem retomar pela tabela
+                with self._lock:
+                    assinantes = list(self._assinantes)
+                for fila in assinantes:
+                    self._desconectar(fila)
+                time.sleep(1)
+            finally:
+                if conn is not None:
+                    conn.close()
@@ -0,0 +1,77 @@
+"""Perfil local (DB_PERFIL=local): SQLite embutido, sem servidor Postgres.
+
+As tabelas são criadas a partir dos próprios modelos ao configurar o banco, então
+um worker, os testes ou o benchmark sobem em milissegundos. Cobre GET/POST de carteira
+e movimentações (inclusive idempotência), saldo, série diária, alocação e exportação;
+o POST com Prefer: respond-async só enfileira. O que depende de recursos do Postgres
+(NOTIFY/SSE, busca por trigramas, rentabilidade, lote com FOR UPDATE, cotações com
+UPDATE ... FROM, advisory locks do job da fila, COPY da importação, partições,
+réplicas, modo ASGI) só funciona no perfil postgres.
+"""
+import sqlite3
+from contextlib import contextmanager
+from datetime import date, datetime
+from decimal import Decimal
+import peewee
+from .metrics import QueryMetricsMixin
+
+CENTAVOS = Decimal('0.01')
+MEMORIA = 'file:investments?mode=memory&cache=shared'
+
+
+def _decimal(valor):
+    # Todas as colunas DECIMAL do schema têm 2 casas
+    return Decimal(valor.decode()).quantize(CENTAVOS)
+
+
+# Colunas com o tipo declarado voltam como Decimal/date/datetime, como no psycopg2,
+# para que as tuplas cruas passem pelos mesmos conversores de serializacao.py
+sqlite3.register_converter('DECIMAL', _decimal)
+sqlite3.register_converter('DATE', lambda valor: date.fromisoformat(valor.decode()[:10]))
+sqlite3.register_converter('DATETIME', lambda valor: datetime.fromisoformat(valor.decode()))
+# Decimal como REAL (o padrão do peewee é texto): evita divisão inteira nas expressões
+sqlite3.register_adapter(Decimal, float)
+
+
+class LocalDatabase(QueryMetricsMixin, peewee.SqliteDatabase):
+    perfil = 'local'
+
+    def __init__(self, caminho):
+        memoria = caminho == ':memory:'
+        super().__init__(
+            MEMORIA if memoria else caminho,
+            uri=memoria,
+            check_same_thread=False,
+            detect_types=sqlite3.PARSE_DECLTYPES,
+            pragmas={'foreign_keys': 1, 'busy_timeout': 5000, 'journal_mode': 'memory' if memoria else 'wal'}
+        )
+        # O banco em memória compartilhado existe enquanto houver uma conexão aberta
+        self._guarda = sqlite3.connect(MEMORIA, uri=True, check_same_thread=False) if memoria else None
+
+    # Mesma interface do banco do perfil postgres (sem réplicas nem pool)
+    @contextmanager
+    def primario(self):
+        yield self
+
+    def iniciar_leitura(self):
+        pass
+
+    def finalizar_leitura(self):
+        pass
+
+    def pool_stats(self):
+        return {}
+
+    def replicas_stats(self):
+        return []
+
+
+def criar_tabelas(db):
+    from ..models.carteira import Carteira
+    from ..models.carteira_diaria import CarteiraDiaria
+    from ..models.eventos import EventoCarteira
+    from ..models.fila_movimentacoes import FilaMovimentacoes
+    from ..models.idempotencia import Idempotencia
+    from ..models.movimentacoes import Movimentacoes
+
+    db.create_tables([Carteira, Movimentacoes, CarteiraDiaria, FilaMovimentacoes, Idempotencia, EventoCarteira], safe=True)
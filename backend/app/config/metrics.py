@@ -0,0 +1,160 @@
+import logging
+import os
+import threading
+import time
+from flask import Response, g, has_request_context, request
+
+logger = logging.getLogger(__name__)
+
+# Limites (em segundos) dos buckets dos histogramas de latência
+BUCKETS_LATENCIA = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+# Limites dos buckets de quantidade de queries por requisição
+BUCKETS_QUERIES = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+# Limite padrão (ms) do log de queries lentas quando o cabeçalho vem sem valor
+SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS', 100))
+SLOW_QUERY_HEADER = 'X-Slow-Query-Log'
+
+
+def _labels(nomes, valores):
+    return ','.join(f'{nome}="{str(valor).replace(chr(34), "")}"' for nome, valor in zip(nomes, valores))
+
+
+class Counter:
+    def __init__(self, nome, descricao, labels=()):
+        self.nome, self.descricao, self.labels = nome, descricao, labels
+        self._valores = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *valores, amount=1):
+        with self._lock:
+            self._valores[valores] = self._valores.get(valores, 0) + amount
+
+    def expor(self):
+        linhas = [f'# HELP {self.nome} {self.descricao}', f'# TYPE {self.nome} counter']
+        with self._lock:
+            for valores, total in sorted(self._valores.items()):
+                linhas.append(f'{self.nome}{{{_labels(self.labels, valores)}}} {total}')
+        return linhas
+
+
+class Histogram:
+    def __init__(self, nome, descricao, labels=(), buckets=BUCKETS_LATENCIA):
+        self.nome, self.descricao, self.labels, self.buckets = nome, descricao, labels, buckets
+        self._valores = {}
+        self._lock = threading.Lock()
+
+    def observe(self, valor, *valores):
+        with self._lock:
+            contagens, soma, total = self._valores.get(valores, ([0] * len(self.buckets), 0.0, 0))
+            for i, limite in enumerate(self.buckets):
+                if valor <= limite:
+                    contagens[i] += 1
+            self._valores[valores] = (contagens, soma + valor, total + 1)
+
+    def expor(self):
+        linhas = [f'# HELP {self.nome} {self.descricao}', f'# TYPE {self.nome} histogram']
+        with self._lock:
+            for valores, (contagens, soma, total) in sorted(self._valores.items()):
+                labels = _labels(self.labels, valores)
+                prefixo = f'{labels},' if labels else ''
+                for limite, contagem in zip(self.buckets, contagens):
+                    linhas.append(f'{self.nome}_bucket{{{prefixo}le="{limite}"}} {contagem}')
+                linhas.append(f'{self.nome}_bucket{{{prefixo}le="+Inf"}} {total}')
+                linhas.append(f'{self.nome}_sum{{{labels}}} {soma}')
+                linhas.append(f'{self.nome}_count{{{labels}}} {total}')
+        return linhas
+
+
+requisicoes = Counter('http_requests_total', 'Requisições HTTP atendidas', ('method', 'endpoint', 'status'))
+latencia = Histogram('http_request_duration_seconds', 'Latência das requisições HTTP', ('method', 'endpoint'))
+queries_por_requisicao = Histogram('db_queries_per_request', 'Queries SQL executadas por requisição',
+                                   ('method', 'endpoint'), BUCKETS_QUERIES)
+tempo_queries_por_requisicao = Histogram('db_query_seconds_per_request', 'Tempo gasto em SQL por requisição',
+                                         ('method', 'endpoint'))
+queries = Counter('db_queries_total', 'Queries SQL executadas')
+tempo_queries = Histogram('db_query_duration_seconds', 'Latência de cada query SQL')
+
+
+class QueryMetricsMixin:
+    """Mede cada query executada pelo peewee e acumula na requisição corrente."""
+
+    def execute_sql(self, sql, params=None, *args, **kwargs):
+        inicio = time.perf_counter()
+        try:
+            return super().execute_sql(sql, params, *args, **kwargs)
+        finally:
+            registrar_query(sql, params, time.perf_counter() - inicio)
+
+
+def registrar_query(sql, params, duracao):
+    queries.inc()
+    tempo_queries.observe(duracao)
+    if not has_request_context() or 'query_count' not in g:
+        return
+    g.query_count += 1
+    g.query_time += duracao
+    if g.slow_query_ms is not None and duracao * 1000 >= g.slow_query_ms:
+        g.slow_queries.append((sql, params, duracao))
+
+
+def _endpoint():
+    return request.url_rule.rule if request.url_rule else 'desconhecido'
+
+
+def _iniciar_requisicao():
+    g.request_start = time.perf_counter()
+    g.query_count = 0
+    g.query_time = 0.0
+    g.slow_queries = []
+    # Log de queries lentas opcional, ligado pelo cabeçalho X-Slow-Query-Log: <limite em ms>
+    limite = request.headers.get(SLOW_QUERY_HEADER)
+    try:
+        g.slow_query_ms = (float(limite) if limite else SLOW_QUERY_MS) if limite is not None else None
+    except ValueError:
+        g.slow_query_ms = SLOW_QUERY_MS
+
+
+def _finalizar_requisicao(response):
+    if 'request_start' not in g:
+        return response
+    duracao = time.perf_counter() - g.request_start
+    endpoint = _endpoint()
+    requisicoes.inc(request.method, endpoint, response.status_code)
+    latencia.observe(duracao, request.method, endpoint)
+    queries_por_requisicao.observe(g.query_count, request.method, endpoint)
+    tempo_queries_por_requisicao.observe(g.query_time, request.method, endpoint)
+
+    if g.slow_query_ms is not None:
+        response.headers['X-Query-Count'] = str(g.query_count)
+        response.headers['X-Query-Time-Ms'] = f'{g.query_time * 1000:.3f}'
+        for sql, params, tempo in g.slow_queries:
+            logger.warning(f"Query lenta ({tempo * 1000:.1f} ms) em {request.method} {request.path}: {sql} {params}")
+    return response
+
+
+# Estatísticas do pool que são contadores (as demais são valores instantâneos)
+CONTADORES_POOL = ('created', 'recycled', 'discarded', 'timeouts')
+
+
+def expor_metricas(db):
+    linhas = []
+    for metrica in (requisicoes, latencia, queries_por_requisicao, tempo_queries_por_requisicao, queries, tempo_queries):
+        linhas += metrica.expor()
+    for nome, valor in db.pool_stats().items():
+        if nome in CONTADORES_POOL:
+            # Só crescem: counter com sufixo _total, para rate() no Prometheus
+            linhas += [f'# TYPE db_pool_{nome}_total counter', f'db_pool_{nome}_total {valor}']
+        else:
+            linhas += [f'# TYPE db_pool_{nome} gauge', f'db_pool_{nome} {valor}']
+    return '\n'.join(linhas) + '\n'
+
+
+def instrumentar(app, db):
+    """Registra os hooks de métricas e a rota /metrics (formato texto do Prometheus)."""
+    app.before_request(_iniciar_requisicao)
+    app.after_request(_finalizar_requisicao)
+    app.add_url_rule(
+        '/metrics', 'metrics',
+        lambda: Response(expor_metricas(db), mimetype='text/plain; version=0.0.4')
+    )
@@ -0,0 +1,140 @@
+import heapq
+import threading
+import time
+from playhouse.pool import MaxConnectionsExceeded, PooledDatabase
+from playhouse.postgres_ext import PooledPostgresqlExtDatabase
+
+
+class MonitoredPooledPostgresqlDatabase(PooledPostgresqlExtDatabase):
+    """Pool de conexões com overflow, idle timeout, health check e estatísticas.
+
+    - pool_size: conexões mantidas ociosas no pool
+    - max_overflow: conexões extras permitidas em picos (fechadas ao retornar)
+    - stale_timeout: idade máxima de uma conexão antes de ser reciclada
+    - idle_timeout: tempo máximo que uma conexão pode ficar ociosa no pool
+    - timeout: tempo máximo de espera por uma conexão livre
+    - pre_ping: executa SELECT 1 antes de entregar uma conexão reaproveitada
+    """
+
+    def __init__(self, database, pool_size=5, max_overflow=10, idle_timeout=None,
+                 pre_ping=True, **kwargs):
+        self._pool_size = pool_size
+        self._idle_timeout = idle_timeout
+        self._pre_ping = pre_ping
+        # Momento em que cada conexão ociosa voltou ao pool
+        self._idle_since = {}
+        self._stats_lock = threading.Lock()
+        self._stats = {'created': 0, 'recycled': 0, 'discarded': 0, 'waiting': 0, 'timeouts': 0}
+        kwargs.setdefault('max_connections', pool_size + max_overflow)
+        super().__init__(database, **kwargs)
+
+    def _incr(self, key, amount=1):
+        with self._stats_lock:
+            self._stats[key] += amount
+
+    def connect(self, reuse_if_open=False):
+        # Mesmo laço do PooledDatabase.connect, contando quem está esperando
+        deadline = time.monotonic() + (self._wait_timeout or 0)
+        while True:
+            try:
+                return super(PooledDatabase, self).connect(reuse_if_open)
+            except MaxConnectionsExceeded:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._incr('timeouts')
+                    raise MaxConnectionsExceeded('Max connections exceeded, timed out attempting to connect.')
+                self._incr('waiting')
+                try:
+                    with self._pool_available:
+                        self._pool_available.wait(timeout=min(remaining, 1.0))
+                finally:
+                    self._incr('waiting', -1)
+
+    def _connect(self):
+        while True:
+            with self._pool_lock:
+                # Descarta as conexões ociosas há mais de idle_timeout (sem I/O com o banco)
+                now = time.time()
+                expired = []
+                if self._idle_timeout:
+                    available = []
+                    for item in self._connections:
+                        key = self.conn_key(item[2])
+                        if (now - self._idle_since.get(key, now)) > self._idle_timeout:
+                            self._idle_since.pop(key, None)
+                            expired.append(item[2])
+                        else:
+                            available.append(item)
+                    if expired:
+                        heapq.heapify(available)
+                        self._connections = available
+
+                pooled = {self.conn_key(item[2]) for item in self._connections}
+                conn = super()._connect()
+                key = self.conn_key(conn)
+                self._idle_since.pop(key, None)
+                reused = key in pooled
+
+            if expired:
+                for old in expired:
+                    self._close_raw(old)
+                self._incr('recycled', len(expired))
+            if not reused:
+                self._incr('created')
+                return conn
+
+            # Health check só da conexão entregue, fora do lock; se falhar, descarta e tenta outra
+            if not self._pre_ping or self._ping(conn):
+                return conn
+            with self._pool_lock:
+                self._in_use.pop(key, None)
+                self._pool_available.notify()
+            self._close_raw(conn)
+            self._incr('discarded')
+
+    def _ping(self, conn):
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            conn.rollback()
+            return True
+        except Exception:
+            return False
+
+    def _is_stale(self, timestamp):
+        stale = super()._is_stale(timestamp)
+        if stale:
+            self._incr('recycled')
+        return stale
+
+    def _close(self, conn, close_conn=False):
+        with self._pool_lock:
+            super()._close(conn, close_conn)
+            if not any(item[2] is conn for item in self._connections):
+                return
+            if len(self._connections) > self._pool_size:
+                # Conexões de overflow são fechadas em vez de voltarem ao pool
+                self._connections = [item for item in self._connections if item[2] is not conn]
+                heapq.heapify(self._connections)
+                self._close_raw(conn)
+            else:
+                self._idle_since[self.conn_key(conn)] = time.time()
+
+    def close_idle(self):
+        with self._pool_lock:
+            super().close_idle()
+            self._idle_since.clear()
+
+    def pool_stats(self):
+        with self._pool_lock:
+            checked_out = len(self._in_use)
+            idle = len(self._connections)
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats.update({
+            'checked_out': checked_out,
+            'idle': idle,
+            'pool_size': self._pool_size,
+            'max_connections': self._max_connections,
+        })
+        return stats
@@ -0,0 +1,165 @@
+import itertools
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from flask import request
+
+logger = logging.getLogger(__name__)
+
+# Atraso máximo (s) aceito numa réplica antes de voltar a ler do primário
+REPLICA_MAX_LAG = float(os.environ.get('DB_REPLICA_MAX_LAG', 5))
+# Intervalo (s) entre medições de atraso de cada réplica
+REPLICA_LAG_CHECK = float(os.environ.get('DB_REPLICA_LAG_CHECK', 1))
+# Read-your-writes: segundos lendo do primário após um POST/PUT do cliente (0 desliga)
+REPLICA_STICKY = float(os.environ.get('DB_REPLICA_STICKY', 0))
+COOKIE_PRIMARIO = 'primario_ate'
+
+# Atraso de replicação em segundos; 0 se não for réplica ou se já aplicou tudo o que recebeu
+SQL_ATRASO = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+"""
+
+
+class ReplicaRoutingMixin:
+    """Envia os SELECTs das requisições de leitura para réplicas.
+
+    Escritas, blocos db.atomic() e qualquer SQL fora de uma requisição de leitura
+    continuam no primário. Cada requisição usa uma única réplica, escolhida em
+    rodízio entre as que estão com atraso abaixo de max_lag.
+    """
+
+    def __init__(self, database, replicas=(), max_lag=REPLICA_MAX_LAG, lag_check=REPLICA_LAG_CHECK, **kwargs):
+        self._replicas = list(replicas)
+        self._rodizio = itertools.cycle(range(len(self._replicas)))
+        self._max_lag = max_lag
+        self._lag_check = lag_check
+        # Último atraso medido por réplica: índice -> (momento, atraso em s, ou None se inacessível)
+        self._atrasos = {}
+        self._atrasos_lock = threading.Lock()
+        self._roteamento = threading.local()
+        super().__init__(database, **kwargs)
+
+    def iniciar_leitura(self):
+        """Marca a thread atual como requisição de leitura (pode usar réplica)."""
+        self._roteamento.leitura = bool(self._replicas)
+        self._roteamento.replica = None
+
+    def finalizar_leitura(self):
+        """Devolve a conexão da réplica ao pool e volta a rotear tudo ao primário."""
+        replica = getattr(self._roteamento, 'replica', None)
+        self._roteamento.leitura = False
+        self._roteamento.replica = None
+        if replica and not replica.is_closed():
+            replica.close()
+
+    @contextmanager
+    def primario(self):
+        """Força o primário dentro do bloco (ex.: montar snapshots que vão para o cache)."""
+        leitura = getattr(self._roteamento, 'leitura', False)
+        self._roteamento.leitura = False
+        try:
+            yield self
+        finally:
+            self._roteamento.leitura = leitura
+
+    def execute_sql(self, sql, params=None, *args, **kwargs):
+        replica = self._replica_para(sql)
+        if replica is not None:
+            return replica.execute_sql(sql, params, *args, **kwargs)
+        return super().execute_sql(sql, params, *args, **kwargs)
+
+    def _replica_para(self, sql):
+        if not getattr(self._roteamento, 'leitura', False) or self.in_transaction():
+            return None
+        if not sql.lstrip()[:6].upper() == 'SELECT':
+            return None
+        if self._roteamento.replica is None:
+            self._roteamento.replica = self._escolher_replica()
+        return self._roteamento.replica or None
+
+    def _escolher_replica(self):
+        for _ in range(len(self._replicas)):
+            indice = next(self._rodizio)
+            replica = self._replicas[indice]
+            atraso = self._atraso(indice)
+            if atraso is None or atraso > self._max_lag:
+                continue
+            try:
+                replica.connect(reuse_if_open=True)
+                return replica
+            except Exception as e:
+                logger.warning(f"Réplica {indice} indisponível: {str(e)}")
+                self._registrar_atraso(indice, None)
+        # Nenhuma réplica saudável: a requisição inteira lê do primário
+        return False
+
+    def _atraso(self, indice):
+        with self._atrasos_lock:
+            medido_em, atraso = self._atrasos.get(indice, (0, None))
+        if time.monotonic() - medido_em < self._lag_check:
+            return atraso
+        return self._medir_atraso(indice)
+
+    def _medir_atraso(self, indice):
+        replica = self._replicas[indice]
+        atraso = None
+        try:
+            aberta = not replica.is_closed()
+            replica.connect(reuse_if_open=True)
+            try:
+                atraso = float(replica.execute_sql(SQL_ATRASO).fetchone()[0])
+            finally:
+                if not aberta:
+                    replica.close()
+        except Exception as e:
+            logger.warning(f"Falha ao medir atraso da réplica {indice}: {str(e)}")
+        if atraso is not None and atraso > self._max_lag:
+            logger.warning(f"Réplica {indice} com atraso de {atraso:.1f}s, lendo do primário")
+        self._registrar_atraso(indice, atraso)
+        return atraso
+
+    def _registrar_atraso(self, indice, atraso):
+        with self._atrasos_lock:
+            self._atrasos[indice] = (time.monotonic(), atraso)
+
+    def replicas_stats(self):
+        with self._atrasos_lock:
+            atrasos = dict(self._atrasos)
+        return [{
+            'replica': indice,
+            'lag_seconds': atrasos.get(indice, (0, None))[1],
+            'pool': replica.pool_stats(),
+        } for indice, replica in enumerate(self._replicas)]
+
+
+def rotear(app, db):
+    """Registra no app o roteamento de leituras (GET/HEAD) para as réplicas do db."""
+
+    @app.before_request
+    def _iniciar_roteamento():
+        if request.method not in ('GET', 'HEAD'):
+            return
+        # Read-your-writes: o cliente que acabou de escrever continua lendo do primário
+        try:
+            primario_ate = float(request.cookies.get(COOKIE_PRIMARIO, 0))
+        except ValueError:
+            primario_ate = 0
+        if primario_ate < time.time():
+            db.iniciar_leitura()
+
+    @app.after_request
+    def _fixar_primario(response):
+        if REPLICA_STICKY and request.method not in ('GET', 'HEAD', 'OPTIONS') and response.status_code < 400:
+            response.set_cookie(COOKIE_PRIMARIO, f'{time.time() + REPLICA_STICKY:.3f}',
+                                max_age=int(REPLICA_STICKY) + 1, httponly=True, samesite='Lax')
+        return response
+
+    @app.teardown_request
+    def _finalizar_roteamento(exc):
+        db.finalizar_leitura()
@@ -0,0 +1,267 @@
+"""Conciliação do histórico com os saldos gravados.
+
+Lê as movimentações em blocos colunares (arrays NumPy, valores em centavos), em
+ordem (carteira_id, data_operacao, id), recalcula o saldo após cada movimentação
+com operações vetorizadas, inclusive a redução proporcional do valor investido
+no resgate, e compara com saldo_cotas/saldo_investido de cada linha e com os
+saldos da tabela carteira. Requer o pacote numpy.
+
+Cada fundo parte de zero ou, se tiver partições arquivadas por app.jobs.particoes,
+do saldo gravado na sua última movimentação arquivada (contado em
+carteiras_historico_parcial); todas as linhas anexadas, inclusive a primeira, são
+conferidas. Fundos sem nenhuma movimentação não são comparados com a tabela carteira.
+
+    python -m app.jobs.conciliacao               # apenas relata (sai com código 1 se houver divergência)
+    python -m app.jobs.conciliacao --corrigir    # regrava os saldos divergentes
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime
+from decimal import Decimal
+import peewee
+from ..config.cache import snapshot_cache
+from ..config.database import db, logger
+from ..models.carteira import Carteira
+from ..models.movimentacoes import gravar_saldos_movimentacoes
+from ..models.rentabilidade import numpy_ou_erro
+from .particoes import SCHEMA_ARQUIVO
+
+# Linhas lidas do cursor no servidor por bloco
+CONCILIACAO_CHUNK = int(os.environ.get('CONCILIACAO_CHUNK', 500000))
+# Divergências listadas no relatório
+EXEMPLOS_MAX = 20
+
+SQL_HISTORICO = """
+SELECT id, carteira_id, (tipo = 'RESGATE')::INTEGER,
+       (quantidade_cotas * 100)::BIGINT, (valor * 100)::BIGINT,
+       (saldo_cotas * 100)::BIGINT, (saldo_investido * 100)::BIGINT
+FROM movimentacoes
+ORDER BY carteira_id, data_operacao, id
+"""
+
+# Partições desanexadas para o schema de arquivo
+SQL_ARQUIVADAS = """
+SELECT tablename FROM pg_tables
+WHERE schemaname = %s AND tablename LIKE 'movimentacoes\\_p%%'
+ORDER BY tablename
+"""
+
+
+def recalcular(np, carteira, resgate, quantidade, valor, anterior=None, semente=None):
+    """Saldos (cotas, investido), em centavos, após cada linha de um bloco ordenado por carteira.
+
+    anterior: (carteira_id, cotas, investido) da última linha do bloco anterior, usado
+    se o bloco começar no mesmo fundo. semente: arrays (cotas, investido) por linha com o
+    saldo inicial de cada fundo na sua primeira linha (zero se omitido). Devolve
+    (cotas, investido, invalidas), onde invalidas marca resgates maiores que o saldo de cotas.
+    """
+    n = len(carteira)
+    posicoes = np.arange(n)
+    novo = np.ones(n, dtype=bool)
+    novo[1:] = carteira[1:] != carteira[:-1]
+    inicio = np.flatnonzero(novo)
+    grupo = np.cumsum(novo) - 1
+    if semente is None:
+        cotas_inicio = np.zeros(len(inicio), dtype=np.int64)
+        investido_inicio = np.zeros(len(inicio), dtype=np.int64)
+    else:
+        cotas_inicio = semente[0][inicio].copy()
+        investido_inicio = semente[1][inicio].copy()
+    if anterior is not None and carteira[0] == anterior[0]:
+        cotas_inicio[0], investido_inicio[0] = anterior[1], anterior[2]
+
+    def acumular(x):
+        # Soma acumulada reiniciada em cada fundo
+        soma = np.cumsum(x)
+        return soma - (soma[inicio] - x[inicio])[grupo]
+
+    cotas = cotas_inicio[grupo] + acumular(np.where(resgate, -quantidade, quantidade))
+    aportes = acumular(np.where(resgate, 0, valor))
+
+    # O valor investido só deixa de ser soma de aportes nos resgates. Eles são
+    # resolvidos por ordem dentro do fundo: o k-ésimo resgate de todos os fundos de uma vez.
+    resgates = np.flatnonzero(resgate)
+    investido_resgate = np.zeros(n, dtype=np.int64)
+    invalidas = np.zeros(n, dtype=bool)
+    if len(resgates):
+        grupos = grupo[resgates]
+        primeiro = np.ones(len(resgates), dtype=bool)
+        primeiro[1:] = grupos[1:] != grupos[:-1]
+        indices = np.arange(len(resgates))
+        ordem = indices - np.maximum.accumulate(np.where(primeiro, indices, 0))
+        por_ordem = np.argsort(ordem, kind='stable')
+        limites = np.cumsum(np.bincount(ordem))
+
+        base = investido_inicio.copy()
+        referencia = np.zeros(len(inicio), dtype=np.int64)
+        for sel in np.split(resgates[por_ordem], limites[:-1]):
+            g = grupo[sel]
+            antes = base[g] + aportes[sel] - referencia[g]
+            cotas_antes = cotas[sel] + quantidade[sel]
+            invalidas[sel] = quantidade[sel] > cotas_antes
+            restante = np.where(cotas_antes > 0, (cotas_antes - quantidade[sel]) / np.maximum(cotas_antes, 1), 0)
+            # Arredondamento half-up para centavos, como quantizar()
+            depois = np.floor(antes * restante + 0.5).astype(np.int64)
+            investido_resgate[sel] = depois
+            base[g] = depois
+            referencia[g] = aportes[sel]
+
+    ultimo_resgate = np.maximum.accumulate(np.where(resgate, posicoes, -1))
+    tem_resgate = ultimo_resgate >= inicio[grupo]
+    j = np.where(tem_resgate, ultimo_resgate, 0)
+    investido = np.where(tem_resgate, investido_resgate[j] + aportes - aportes[j], investido_inicio[grupo] + aportes)
+    return cotas, investido, invalidas
+
+
+def _decimal(centavos):
+    return Decimal(int(centavos)).scaleb(-2)
+
+
+def saldos_arquivados():
+    """Saldo gravado na última movimentação arquivada de cada fundo, em centavos: {carteira_id: (cotas, investido)}.
+
+    As partições arquivadas são sempre anteriores às anexadas, então esse é o saldo
+    de cada fundo antes da sua primeira movimentação anexada.
+    """
+    tabelas = [nome for nome, in db.execute_sql(SQL_ARQUIVADAS, (SCHEMA_ARQUIVO,)).fetchall()]
+    if not tabelas:
+        return {}
+    arquivo = ' UNION ALL '.join(
+        f'SELECT carteira_id, data_operacao, id, saldo_cotas, saldo_investido FROM "{SCHEMA_ARQUIVO}"."{nome}"'
+        for nome in tabelas
+    )
+    rows = db.execute_sql(
+        'SELECT DISTINCT ON (carteira_id) carteira_id, (saldo_cotas * 100)::BIGINT, (saldo_investido * 100)::BIGINT '
+        f'FROM ({arquivo}) a ORDER BY carteira_id, data_operacao DESC, id DESC'
+    ).fetchall()
+    return {carteira_id: (cotas, investido) for carteira_id, cotas, investido in rows}
+
+
+def conciliar(corrigir=False, chunk=CONCILIACAO_CHUNK):
+    np = numpy_ou_erro()
+    inicio = time.perf_counter()
+    lidas = 0
+    divergentes, invalidas, exemplos = 0, [], []
+    anterior = None
+
+    with db.atomic():
+        # Um snapshot único para o histórico e a tabela carteira
+        db.execute_sql('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ')
+        arquivados = saldos_arquivados()
+        # Fundos só com histórico arquivado terminam no saldo arquivado
+        finais = dict(arquivados)
+        sementes_ids = np.array(sorted(arquivados), dtype=np.int64)
+        sementes = np.array([arquivados[c] for c in sementes_ids.tolist()], dtype=np.int64).reshape(-1, 2)
+
+        # O psycopg2 só aceita cursor nomeado em conexão autocommit (como o peewee a abre) com
+        # WITH HOLD; dentro da transação ele se comporta como um cursor comum no servidor
+        cursor = db.connection().cursor(name='conciliacao', withhold=True)
+        cursor.itersize = chunk
+        cursor.execute(SQL_HISTORICO)
+        while True:
+            rows = cursor.fetchmany(chunk)
+            if not rows:
+                break
+            id_, carteira, resgate, quantidade, valor, saldo_cotas, saldo_investido = np.array(rows, dtype=np.int64).T
+            resgate = resgate.astype(bool)
+
+            # Saldo antes da primeira linha de cada fundo: o da última movimentação arquivada, ou zero
+            semente = None
+            if len(sementes_ids):
+                posicao = np.minimum(np.searchsorted(sementes_ids, carteira), len(sementes_ids) - 1)
+                arquivado = sementes_ids[posicao] == carteira
+                semente = (np.where(arquivado, sementes[posicao, 0], 0), np.where(arquivado, sementes[posicao, 1], 0))
+            cotas, investido, invalida = recalcular(np, carteira, resgate, quantidade, valor, anterior, semente)
+            lidas += len(rows)
+
+            erradas = np.flatnonzero((cotas != saldo_cotas) | (investido != saldo_investido))
+            divergentes += len(erradas)
+            invalidas += id_[invalida].tolist()
+            for i in erradas[:EXEMPLOS_MAX - len(exemplos)]:
+                exemplos.append({
+                    'movimentacao_id': int(id_[i]), 'carteira_id': int(carteira[i]),
+                    'gravado': [float(_decimal(saldo_cotas[i])), float(_decimal(saldo_investido[i]))],
+                    'calculado': [float(_decimal(cotas[i])), float(_decimal(investido[i]))]
+                })
+            if corrigir and len(erradas):
+                gravar_saldos_movimentacoes([(int(id_[i]), _decimal(cotas[i]), _decimal(investido[i])) for i in erradas])
+
+            # Saldo final de cada fundo do bloco (o último pode continuar no próximo)
+            fim = np.flatnonzero(np.r_[carteira[1:] != carteira[:-1], True])
+            finais.update(zip(carteira[fim].tolist(), zip(cotas[fim].tolist(), investido[fim].tolist())))
+            anterior = (carteira[-1], cotas[-1], investido[-1])
+        cursor.close()
+
+        # Comparar com a tabela carteira (fundos sem nenhuma movimentação ficam de fora)
+        carteiras_invalidas = set()
+        if invalidas:
+            carteiras_invalidas = {row[0] for row in db.execute_sql(
+                'SELECT DISTINCT carteira_id FROM movimentacoes WHERE id = ANY(%s)', (invalidas,)
+            ).fetchall()}
+        carteiras = []
+        for carteira_id, cotas, investido in db.execute_sql(
+            'SELECT id, (quantidade_cotas * 100)::BIGINT, (valor_investido * 100)::BIGINT FROM carteira ORDER BY id'
+        ).fetchall():
+            calculado = finais.get(carteira_id)
+            if calculado is not None and (cotas, investido) != calculado:
+                carteiras.append((carteira_id, (cotas, investido), calculado))
+
+        if corrigir:
+            # Fundos com resgate acima do saldo ficam de fora: o saldo calculado seria negativo
+            corrigiveis = [(cid, _decimal(c), _decimal(i)) for cid, _, (c, i) in carteiras if cid not in carteiras_invalidas]
+            if corrigiveis:
+                valores = peewee.ValuesList(corrigiveis, columns=('id', 'quantidade_cotas', 'valor_investido'), alias='v')
+                (Carteira
+                 .update(quantidade_cotas=valores.c.quantidade_cotas,
+                         valor_investido=valores.c.valor_investido,
+                         atualizado_em=datetime.now())
+                 .from_(valores)
+                 .where(Carteira.id == valores.c.id)
+                 .execute())
+    if corrigir and carteiras:
+        snapshot_cache.invalidate()
+
+    duracao = time.perf_counter() - inicio
+    return {
+        'movimentacoes': lidas,
+        'carteiras': len(finais),
+        'carteiras_historico_parcial': len(arquivados),
+        'movimentacoes_divergentes': divergentes,
+        'carteiras_divergentes': len(carteiras),
+        'exemplos_carteiras': [{
+            'carteira_id': cid,
+            'gravado': [float(_decimal(v)) for v in gravado],
+            'calculado': [float(_decimal(v)) for v in calculado]
+        } for cid, gravado, calculado in carteiras[:EXEMPLOS_MAX]],
+        'resgates_sem_saldo': invalidas[:EXEMPLOS_MAX],
+        'exemplos_movimentacoes': exemplos,
+        'corrigido': corrigir,
+        'duracao_s': round(duracao, 3),
+        'linhas_por_segundo': round(lidas / duracao) if duracao else None
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--corrigir', action='store_true', help='regrava os saldos divergentes')
+    parser.add_argument('--chunk', type=int, default=CONCILIACAO_CHUNK, help='linhas por bloco')
+    args = parser.parse_args()
+
+    db.connect(reuse_if_open=True)
+    try:
+        resultado = conciliar(args.corrigir, args.chunk)
+    finally:
+        db.close()
+
+    divergencias = resultado['movimentacoes_divergentes'] + resultado['carteiras_divergentes']
+    logger.info(f"Conciliação: {resultado['movimentacoes']} movimentações, {divergencias} divergências")
+    print(json.dumps(resultado, ensure_ascii=False))
+    if divergencias and not args.corrigir:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,161 @@
+"""Workers do modo assíncrono: consomem fila_movimentacoes com group commit.
+
+Cada worker reserva um lote de operações pendentes, trava os fundos envolvidos
+com advisory locks (um fundo nunca é processado por dois workers ao mesmo
+tempo, preservando a ordem por fundo) e grava o lote inteiro numa transação,
+com uma atualização de saldo por fundo. Se o banco recusar o lote, as operações
+são refeitas uma a uma e só as recusadas ficam REJEITADA, sem travar a fila.
+
+    python -m app.jobs.fila --workers 4 --lote 500
+"""
+import argparse
+import threading
+import time
+from datetime import datetime
+import peewee
+from ..config.cache import MemoryCacheBackend, snapshot_cache
+from ..config.database import db, logger
+from ..models.eventos import emitir_recarregar
+from ..models.fila_movimentacoes import FilaMovimentacoes
+from ..models.operacoes import registrar_operacoes
+
+# Namespace dos advisory locks por fundo
+ADVISORY_FILA = 7401
+
+# Operações pendentes em ordem de chegada, apenas de fundos que este worker conseguiu travar.
+# Os advisory locks são tentados só nos fundos das linhas já limitadas pelo LIMIT (a CTE com
+# função volátil é materializada), então o worker não trava fundos que não vai processar.
+# O FOR UPDATE relê a linha se outro worker acabou de processá-la.
+SQL_RESERVAR = """
+WITH candidatas AS (
+    SELECT id, carteira_id FROM fila_movimentacoes
+    WHERE status = 'PENDENTE'
+    ORDER BY id
+    LIMIT %s
+), fundos AS (
+    SELECT carteira_id FROM (SELECT DISTINCT carteira_id FROM candidatas) c
+    WHERE pg_try_advisory_xact_lock(%s, carteira_id)
+)
+SELECT f.id, f.carteira_id, f.tipo, f.valor, f.quantidade_cotas
+FROM fila_movimentacoes f
+JOIN candidatas USING (id)
+JOIN fundos ON fundos.carteira_id = f.carteira_id
+WHERE f.status = 'PENDENTE'
+ORDER BY f.id
+FOR UPDATE OF f
+"""
+
+
+def _motivo(erro):
+    # Só a primeira linha da mensagem do banco: o DETAIL repete a linha recusada
+    return str(erro).strip().splitlines()[0]
+
+
+def _registrar(rows, now):
+    # Group commit de um conjunto de linhas da fila: ({posição: movimentacao_id}, {posição: erro})
+    operacoes = [{'carteira_id': carteira_id, 'tipo': tipo, 'valor': valor, 'quantidade': quantidade}
+                 for _, carteira_id, tipo, valor, quantidade in rows]
+    ids, erros, _ = registrar_operacoes(operacoes, now, tudo_ou_nada=False)
+    return ids, erros
+
+
+def processar_lote(tamanho):
+    """Processa até `tamanho` operações da fila numa transação. Devolve quantas foram processadas."""
+    with db.atomic():
+        rows = db.execute_sql(SQL_RESERVAR, (tamanho, ADVISORY_FILA)).fetchall()
+        if not rows:
+            return 0
+
+        now = datetime.now()
+        try:
+            with db.atomic():
+                ids, erros = _registrar(rows, now)
+        except peewee.DatabaseError as e:
+            # Uma linha que o banco recusa desfaria o lote inteiro a cada tentativa e travaria
+            # a fila: refazer uma a uma (cada uma num savepoint), rejeitando só as que falharem
+            logger.warning(f"Fila: lote de {len(rows)} recusado ({_motivo(e)}), processando operação a operação")
+            ids, erros = {}, {}
+            for i, row in enumerate(rows):
+                try:
+                    with db.atomic():
+                        id_, erro = _registrar([row], now)
+                except peewee.DatabaseError as e:
+                    erros[i] = _motivo(e)
+                    continue
+                if 0 in id_:
+                    ids[i] = id_[0]
+                else:
+                    erros[i] = erro[0]
+
+        # Atualizar o status de todas as operações num único UPDATE
+        valores = peewee.ValuesList(
+            [(row[0], 'CONCLUIDA' if i in ids else 'REJEITADA', erros.get(i), ids.get(i)) for i, row in enumerate(rows)],
+            columns=('id', 'status', 'erro', 'movimentacao_id'),
+            alias='v'
+        )
+        (FilaMovimentacoes
+         .update(status=valores.c.status,
+                 erro=valores.c.erro,
+                 movimentacao_id=valores.c.movimentacao_id.cast('integer'),
+                 processado_em=now)
+         .from_(valores)
+         .where(FilaMovimentacoes.id == valores.c.id)
+         .execute())
+        if ids:
+            emitir_recarregar(now)
+
+    # Invalidar o snapshot do GET /api/v1/carteira
+    snapshot_cache.invalidate()
+    logger.info(f"Fila: {len(ids)} movimentações registradas, {len(erros)} rejeitadas")
+    return len(rows)
+
+
+def worker(parar, tamanho, intervalo):
+    db.connect(reuse_if_open=True)
+    try:
+        espera = intervalo / 10
+        while not parar.is_set():
+            try:
+                processadas = processar_lote(tamanho)
+            except Exception as e:
+                logger.error(f"Erro no worker da fila: {str(e)}")
+                processadas = 0
+            if processadas:
+                espera = intervalo / 10
+            else:
+                # Fila vazia: espera crescente até `intervalo`
+                parar.wait(espera)
+                espera = min(espera * 2, intervalo)
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--lote', type=int, default=500, help='operações por transação')
+    parser.add_argument('--intervalo', type=float, default=1.0, help='espera máxima (s) com a fila vazia')
+    args = parser.parse_args()
+
+    if isinstance(snapshot_cache.backend, MemoryCacheBackend):
+        # O cache em memória é por processo: a invalidação feita aqui não chega à API
+        logger.warning('Fila: CACHE_BACKEND=memory; o GET /api/v1/carteira da API só mostra as '
+                       'operações processadas depois de CACHE_TTL. Use CACHE_BACKEND=redis')
+
+    parar = threading.Event()
+    threads = [threading.Thread(target=worker, args=(parar, args.lote, args.intervalo), daemon=True)
+               for _ in range(args.workers)]
+    for t in threads:
+        t.start()
+    logger.info(f"Fila: {args.workers} workers iniciados")
+    try:
+        while any(t.is_alive() for t in threads):
+            time.sleep(0.5)
+    except KeyboardInterrupt:
+        parar.set()
+        for t in threads:
+            t.join()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,223 @@
+"""Importação em massa de movimentações históricas via COPY.
+
+O CSV deve ter cabeçalho com as colunas carteira_id, data_operacao (YYYY-MM-DD),
+tipo, valor, quantidade_cotas e, opcionalmente, criado_em (YYYY-MM-DD HH:MM:SS).
+
+    python -m app.jobs.importacao historico.csv
+"""
+import argparse
+import csv
+import json
+import time
+from datetime import datetime
+from decimal import Decimal
+import peewee
+from playhouse.postgres_ext import ServerSide
+from ..config.cache import snapshot_cache
+from ..config.database import db, logger
+from ..models.carteira import Carteira
+from ..models.eventos import emitir_recarregar
+from ..models.movimentacoes import Movimentacoes, aplicar_movimentacao, gravar_saldos_movimentacoes
+from .particoes import PARTICAO_MESES
+from .serie_diaria import reconstruir_serie
+
+COLUNAS = ['carteira_id', 'data_operacao', 'tipo', 'valor', 'quantidade_cotas', 'criado_em']
+
+# Mesmas restrições de schema.sql, verificadas em SQL sobre a tabela de staging
+DECIMAL_10_2 = r'^\s*[0-9]{1,8}(\.[0-9]{1,2})?\s*$'
+
+SQL_STAGING = """
+CREATE TEMPORARY TABLE staging_movimentacoes (
+    linha BIGSERIAL,
+    carteira_id TEXT,
+    data_operacao TEXT,
+    tipo TEXT,
+    valor TEXT,
+    quantidade_cotas TEXT,
+    criado_em TEXT,
+    movimentacao_id INTEGER,
+    erro TEXT
+) ON COMMIT DROP;
+
+CREATE FUNCTION pg_temp.timestamp_valido(valor TEXT) RETURNS BOOLEAN AS $$
+BEGIN
+    PERFORM valor::TIMESTAMP;
+    RETURN TRUE;
+EXCEPTION WHEN others THEN
+    RETURN FALSE;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+SQL_VALIDAR = f"""
+UPDATE staging_movimentacoes s SET erro = CASE
+    WHEN s.carteira_id IS NULL OR s.carteira_id !~ '^\\s*[0-9]{{1,9}}\\s*$' THEN 'carteira_id inválido'
+    WHEN NOT EXISTS (SELECT 1 FROM carteira c WHERE c.id = s.carteira_id::INTEGER) THEN 'Carteira não encontrada'
+    WHEN s.data_operacao IS NULL OR s.data_operacao !~ '^\\d{{4}}-\\d{{2}}-\\d{{2}}$'
+        OR NOT pg_temp.timestamp_valido(s.data_operacao) THEN 'data_operacao inválida'
+    WHEN s.tipo IS NULL OR s.tipo NOT IN ('APORTE', 'RESGATE') THEN 'tipo deve ser APORTE ou RESGATE'
+    WHEN s.valor IS NULL OR s.valor !~ '{DECIMAL_10_2}' OR s.valor::NUMERIC <= 0 THEN 'valor deve ser um número positivo'
+    WHEN s.quantidade_cotas IS NULL OR s.quantidade_cotas !~ '{DECIMAL_10_2}' OR s.quantidade_cotas::NUMERIC <= 0
+        THEN 'quantidade_cotas deve ser um número positivo'
+    WHEN s.criado_em IS NOT NULL AND s.criado_em <> '' AND NOT pg_temp.timestamp_valido(s.criado_em)
+        THEN 'criado_em inválido'
+END
+"""
+
+# movimentacoes não tem partição default: criar as partições do período importado
+SQL_PARTICOES = """
+SELECT criar_particoes_movimentacoes(de, ate, %s)
+FROM (SELECT MIN(data_operacao::DATE) AS de, MAX(data_operacao::DATE) AS ate
+      FROM staging_movimentacoes WHERE erro IS NULL) AS periodo
+WHERE de IS NOT NULL
+"""
+
+SQL_INSERIR = """
+UPDATE staging_movimentacoes SET movimentacao_id = nextval(pg_get_serial_sequence('movimentacoes', 'id'))
+WHERE erro IS NULL;
+
+-- Os saldos de cada linha são preenchidos por reconstruir_saldos
+INSERT INTO movimentacoes (id, carteira_id, data_operacao, tipo, valor, quantidade_cotas, saldo_cotas, saldo_investido, criado_em)
+SELECT movimentacao_id, carteira_id::INTEGER, data_operacao::DATE, tipo, valor::NUMERIC, quantidade_cotas::NUMERIC, 0, 0,
+       COALESCE(NULLIF(criado_em, '')::TIMESTAMP, data_operacao::TIMESTAMP)
+FROM staging_movimentacoes
+WHERE erro IS NULL
+ORDER BY linha;
+"""
+
+
+def _copiar(arquivo):
+    # COPY direto do arquivo para a tabela de staging (apenas as colunas presentes no cabeçalho)
+    with open(arquivo, newline='', encoding='utf-8') as f:
+        cabecalho = next(csv.reader(f))
+        colunas = [c.strip() for c in cabecalho]
+        desconhecidas = set(colunas) - set(COLUNAS)
+        if desconhecidas:
+            raise ValueError(f'Colunas desconhecidas no CSV: {", ".join(sorted(desconhecidas))}')
+        f.seek(0)
+        cursor = db.connection().cursor()
+        cursor.copy_expert(
+            f"COPY staging_movimentacoes ({', '.join(colunas)}) FROM STDIN WITH (FORMAT csv, HEADER true)", f
+        )
+        return cursor.rowcount
+
+
+def reconstruir_saldos(carteira_ids, importadas=frozenset()):
+    """Recalcula quantidade_cotas/valor_investido das carteiras a partir do histórico.
+
+    Chamar dentro de db.atomic(): as carteiras ficam bloqueadas até o commit.
+
+    Percorre o histórico uma única vez, em ordem (carteira_id, data_operacao, id),
+    regravando o saldo das movimentações que mudaram (as importadas e as posteriores a elas).
+    Resgates importados sem saldo suficiente são removidos e devolvidos como rejeitados.
+    """
+    # Bloquear as carteiras (em ordem de id, evitando deadlocks) antes de ler o histórico:
+    # um POST concorrente espera o commit em vez de ter o saldo sobrescrito pelo UPDATE final
+    list(Carteira
+         .select(Carteira.id)
+         .where(Carteira.id.in_(sorted(carteira_ids)))
+         .order_by(Carteira.id)
+         .for_update()
+         .tuples())
+
+    saldos = {cid: (Decimal('0'), Decimal('0')) for cid in carteira_ids}
+    rejeitadas = []
+    alteradas = []
+    query = (Movimentacoes
+             .select(Movimentacoes.id, Movimentacoes.carteira, Movimentacoes.tipo,
+                     Movimentacoes.quantidade_cotas, Movimentacoes.valor,
+                     Movimentacoes.saldo_cotas, Movimentacoes.saldo_investido)
+             .where(Movimentacoes.carteira.in_(list(carteira_ids)))
+             .order_by(Movimentacoes.carteira, Movimentacoes.data_operacao, Movimentacoes.id)
+             .tuples())
+    for id_, carteira_id, tipo, quantidade, valor, *gravado in ServerSide(query, array_size=10000):
+        try:
+            saldos[carteira_id] = aplicar_movimentacao(*saldos[carteira_id], tipo, quantidade, valor)
+        except ValueError:
+            if id_ not in importadas:
+                raise ValueError(f'Histórico existente da carteira {carteira_id} fica negativo na movimentação {id_}')
+            rejeitadas.append(id_)
+            continue
+        if tuple(gravado) != saldos[carteira_id]:
+            alteradas.append((id_, *saldos[carteira_id]))
+            if len(alteradas) >= 10000:
+                gravar_saldos_movimentacoes(alteradas)
+                alteradas = []
+    if alteradas:
+        gravar_saldos_movimentacoes(alteradas)
+
+    if rejeitadas:
+        Movimentacoes.delete().where(Movimentacoes.id.in_(rejeitadas)).execute()
+
+    if saldos:
+        valores = peewee.ValuesList(
+            [(cid, cotas, investido) for cid, (cotas, investido) in saldos.items()],
+            columns=('id', 'quantidade_cotas', 'valor_investido'),
+            alias='v'
+        )
+        (Carteira
+         .update(quantidade_cotas=valores.c.quantidade_cotas,
+                 valor_investido=valores.c.valor_investido,
+                 atualizado_em=datetime.now())
+         .from_(valores)
+         .where(Carteira.id == valores.c.id)
+         .execute())
+    return rejeitadas
+
+
+def importar_csv(arquivo):
+    inicio = time.perf_counter()
+    with db.atomic():
+        db.execute_sql(SQL_STAGING)
+        lidas = _copiar(arquivo)
+        db.execute_sql(SQL_VALIDAR)
+        db.execute_sql(SQL_PARTICOES, (PARTICAO_MESES,))
+        db.execute_sql(SQL_INSERIR)
+
+        importadas = dict(db.execute_sql(
+            'SELECT movimentacao_id, linha FROM staging_movimentacoes WHERE movimentacao_id IS NOT NULL'
+        ).fetchall())
+        carteira_ids = [row[0] for row in db.execute_sql(
+            'SELECT DISTINCT carteira_id::INTEGER FROM staging_movimentacoes WHERE erro IS NULL'
+        ).fetchall()]
+
+        # Recalcular os saldos de todas as carteiras afetadas numa passada só
+        sem_saldo = reconstruir_saldos(carteira_ids, importadas)
+        reconstruir_serie(carteira_ids)
+
+        rejeitadas = [{'linha': linha, 'erro': erro} for linha, erro in db.execute_sql(
+            'SELECT linha, erro FROM staging_movimentacoes WHERE erro IS NOT NULL ORDER BY linha'
+        ).fetchall()]
+        rejeitadas += [{'linha': importadas[id_], 'erro': 'Quantidade de cotas insuficiente para resgate'}
+                       for id_ in sem_saldo]
+        emitir_recarregar(datetime.now())
+    snapshot_cache.invalidate()
+
+    duracao = time.perf_counter() - inicio
+    resultado = {
+        'lidas': lidas,
+        'importadas': len(importadas) - len(sem_saldo),
+        'rejeitadas': len(rejeitadas),
+        'carteiras_recalculadas': len(carteira_ids),
+        'duracao_s': round(duracao, 3),
+        'linhas_por_s': round(lidas / duracao, 1) if duracao else None,
+        'erros': sorted(rejeitadas, key=lambda r: r['linha'])
+    }
+    logger.info(f"Importação concluída: {lidas} linhas em {duracao:.2f}s, {len(rejeitadas)} rejeitadas")
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('arquivo', help='CSV com as movimentações')
+    args = parser.parse_args()
+
+    db.connect(reuse_if_open=True)
+    try:
+        print(json.dumps(importar_csv(args.arquivo), indent=2, ensure_ascii=False))
+    finally:
+        db.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""Manutenção das partições de movimentacoes (uma por período de data_operacao).
+
+Cria as partições dos próximos meses e, opcionalmente, desanexa as partições antigas
+para o schema de arquivo. movimentacoes não tem partição default (ela impediria a
+leitura ordenada das partições), então o job deve rodar antes de acabarem os meses
+já criados. Feito para rodar periodicamente (cron):
+
+    python -m app.jobs.particoes                        # próximos MOVIMENTACOES_PARTICAO_FUTURAS meses
+    python -m app.jobs.particoes --arquivar-meses 36    # e arquiva o que for mais antigo que 36 meses
+"""
+import argparse
+import json
+import os
+import re
+from datetime import date
+from ..config.database import db, logger
+
+# Tamanho (em meses) de cada partição; mudar o valor só afeta partições novas
+PARTICAO_MESES = int(os.environ.get('MOVIMENTACOES_PARTICAO_MESES', 1))
+# Quantos meses à frente devem ter partição criada
+PARTICAO_FUTURAS = int(os.environ.get('MOVIMENTACOES_PARTICAO_FUTURAS', 3))
+# Schema para onde vão as partições desanexadas
+SCHEMA_ARQUIVO = os.environ.get('MOVIMENTACOES_SCHEMA_ARQUIVO', 'arquivo')
+
+SQL_PARTICOES = """
+SELECT c.relname, pg_get_expr(c.relpartbound, c.oid)
+FROM pg_inherits i
+JOIN pg_class c ON c.oid = i.inhrelid
+WHERE i.inhparent = 'movimentacoes'::regclass
+ORDER BY c.relname
+"""
+
+LIMITES = re.compile(r"FROM \('([0-9-]+)'\) TO \('([0-9-]+)'\)")
+
+
+def _somar_meses(data, meses):
+    total = data.year * 12 + data.month - 1 + meses
+    return date(total // 12, total % 12 + 1, 1)
+
+
+def listar_particoes():
+    """Partições anexadas: lista de (nome, início, fim)."""
+    particoes = []
+    for nome, limites in db.execute_sql(SQL_PARTICOES).fetchall():
+        encontrado = LIMITES.search(limites)
+        if encontrado:
+            particoes.append((nome, date.fromisoformat(encontrado.group(1)), date.fromisoformat(encontrado.group(2))))
+    return particoes
+
+
+def criar_particoes(hoje, futuras=PARTICAO_FUTURAS, meses=PARTICAO_MESES):
+    """Cria as partições que faltam do mês corrente até `futuras` meses à frente."""
+    ate = _somar_meses(hoje, futuras)
+    with db.atomic():
+        cursor = db.execute_sql('SELECT criar_particoes_movimentacoes(%s, %s, %s)', (hoje, ate, meses))
+        return [nome for nome, in cursor.fetchall()]
+
+
+def remover_particao_default(meses=PARTICAO_MESES):
+    """Bancos criados com a antiga partição movimentacoes_default: move as linhas dela para
+    partições de faixa (criadas para o período delas) e a remove. Devolve as linhas movidas.
+
+    Requer a versão atual de criar_particao_movimentacoes (schema.sql).
+    """
+    if db.execute_sql("SELECT to_regclass('movimentacoes_default')").fetchone()[0] is None:
+        return 0
+    with db.atomic():
+        db.execute_sql('ALTER TABLE movimentacoes DETACH PARTITION movimentacoes_default')
+        de, ate = db.execute_sql('SELECT MIN(data_operacao), MAX(data_operacao) FROM movimentacoes_default').fetchone()
+        if de is not None:
+            db.execute_sql('SELECT criar_particoes_movimentacoes(%s, %s, %s)', (de, ate, meses))
+        movidas = db.execute_sql('INSERT INTO movimentacoes SELECT * FROM movimentacoes_default').rowcount
+        db.execute_sql('DROP TABLE movimentacoes_default')
+    return movidas
+
+
+def arquivar_particoes(hoje, meses_retidos):
+    """Desanexa as partições que terminam antes de `meses_retidos` meses atrás e as move para o schema de arquivo.
+
+    As linhas arquivadas deixam de aparecer nas consultas e nos jobs de reconstrução
+    de saldo (importação e série diária), que passam a enxergar só o histórico anexado.
+    """
+    limite = _somar_meses(hoje.replace(day=1), -meses_retidos)
+    arquivadas = []
+    with db.atomic():
+        db.execute_sql(f'CREATE SCHEMA IF NOT EXISTS "{SCHEMA_ARQUIVO}"')
+        for nome, _, fim in listar_particoes():
+            if fim > limite:
+                continue
+            db.execute_sql(f'ALTER TABLE movimentacoes DETACH PARTITION "{nome}"')
+            db.execute_sql(f'ALTER TABLE "{nome}" SET SCHEMA "{SCHEMA_ARQUIVO}"')
+            arquivadas.append(f'{SCHEMA_ARQUIVO}.{nome}')
+    return arquivadas
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--futuras', type=int, default=PARTICAO_FUTURAS, help='meses à frente com partição criada')
+    parser.add_argument('--meses', type=int, default=PARTICAO_MESES, help='tamanho de cada partição, em meses')
+    parser.add_argument('--arquivar-meses', type=int, help='arquiva partições mais antigas que esse número de meses')
+    args = parser.parse_args()
+
+    db.connect(reuse_if_open=True)
+    try:
+        hoje = date.today()
+        movidas = remover_particao_default(args.meses)
+        criadas = criar_particoes(hoje, args.futuras, args.meses)
+        arquivadas = arquivar_particoes(hoje, args.arquivar_meses) if args.arquivar_meses else []
+        logger.info(f"Partições de movimentacoes: {len(criadas)} criadas, {len(arquivadas)} arquivadas")
+        print(json.dumps({'criadas': criadas, 'arquivadas': arquivadas, 'movidas_da_default': movidas}))
+    finally:
+        db.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""Backfill da série diária de saldos (tabela carteira_diaria) a partir do histórico.
+
+    python -m app.jobs.serie_diaria              # todas as carteiras
+    python -m app.jobs.serie_diaria 1 2 3        # apenas as carteiras informadas
+"""
+import argparse
+import json
+import time
+from datetime import datetime
+from decimal import Decimal
+from playhouse.postgres_ext import ServerSide
+from ..config.database import db, logger
+from ..models.carteira_diaria import CarteiraDiaria
+from ..models.movimentacoes import Movimentacoes, aplicar_movimentacao
+
+# Linhas gravadas por INSERT
+BACKFILL_CHUNK = 10000
+
+
+def reconstruir_serie(carteira_ids=None):
+    """Recria os saldos de fim de dia das carteiras numa única passada pelo histórico."""
+    now = datetime.now()
+    query = (Movimentacoes
+             .select(Movimentacoes.carteira, Movimentacoes.data_operacao, Movimentacoes.tipo,
+                     Movimentacoes.quantidade_cotas, Movimentacoes.valor)
+             .order_by(Movimentacoes.carteira, Movimentacoes.data_operacao, Movimentacoes.id)
+             .tuples())
+    apagar = CarteiraDiaria.delete()
+    if carteira_ids is not None:
+        query = query.where(Movimentacoes.carteira.in_(list(carteira_ids)))
+        apagar = apagar.where(CarteiraDiaria.carteira.in_(list(carteira_ids)))
+
+    gravadas = 0
+    linhas = []
+
+    def gravar():
+        nonlocal gravadas, linhas
+        if linhas:
+            CarteiraDiaria.insert_many(linhas).execute()
+            gravadas += len(linhas)
+            linhas = []
+
+    with db.atomic():
+        apagar.execute()
+        atual, dia, saldo = None, None, None
+        for carteira_id, data_operacao, tipo, quantidade, valor in ServerSide(query, array_size=BACKFILL_CHUNK):
+            if (carteira_id, data_operacao) != (atual, dia) and atual is not None:
+                linhas.append((atual, dia, *saldo, now))
+            if carteira_id != atual:
+                saldo = (Decimal('0'), Decimal('0'))
+            atual, dia = carteira_id, data_operacao
+            saldo = aplicar_movimentacao(*saldo, tipo, quantidade, valor)
+            if len(linhas) >= BACKFILL_CHUNK:
+                gravar()
+        if atual is not None:
+            linhas.append((atual, dia, *saldo, now))
+        gravar()
+    return gravadas
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('carteira_ids', nargs='*', type=int)
+    args = parser.parse_args()
+
+    db.connect(reuse_if_open=True)
+    try:
+        inicio = time.perf_counter()
+        gravadas = reconstruir_serie(args.carteira_ids or None)
+        duracao = time.perf_counter() - inicio
+        logger.info(f"Série diária reconstruída: {gravadas} dias em {duracao:.2f}s")
+        print(json.dumps({'dias_gravados': gravadas, 'duracao_s': round(duracao, 3)}))
+    finally:
+        db.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,5 @@
 from peewee import (
-    Model, IntegerField, CharField, DecimalField, DateTimeField, Check
+    Model, IntegerField, CharField, DecimalField, DateTimeField, Check, fn
 )
 from ..config.database import db
 
@@ -19,4 +19,7 @@ class Carteira(BaseModel):
     atualizado_em = DateTimeField(null=False)
 
     class Meta:
-        table_name = 'carteira'
\ No newline at end of file
+        table_name = 'carteira'
+
+# Valor de mercado (cotas x valor da cota), calculado no banco
+VALOR_MERCADO = fn.ROUND(Carteira.quantidade_cotas * Carteira.valor_cota, 2)
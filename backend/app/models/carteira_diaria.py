@@ -0,0 +1,41 @@
+from peewee import (
+    Model, DateField, DecimalField, ForeignKeyField, DateTimeField, CompositeKey
+)
+from ..config.database import db
+from .carteira import Carteira
+
+class BaseModel(Model):
+    class Meta:
+        database = db
+
+class CarteiraDiaria(BaseModel):
+    carteira = ForeignKeyField(Carteira, backref='diarias', column_name='carteira_id', null=False)
+    data = DateField(null=False)
+    quantidade_cotas = DecimalField(max_digits=10, decimal_places=2, null=False)
+    valor_investido = DecimalField(max_digits=10, decimal_places=2, null=False)
+    atualizado_em = DateTimeField(null=False)
+
+    class Meta:
+        table_name = 'carteira_diaria'
+        primary_key = CompositeKey('carteira', 'data')
+
+
+def registrar_saldo_diario(saldos, data, now):
+    """Grava o saldo de fim de dia das carteiras (lista de (carteira_id, quantidade_cotas, valor_investido))."""
+    insercao_saldo_diario(saldos, data, now).execute()
+
+
+def insercao_saldo_diario(saldos, data, now):
+    # Upsert do saldo do dia, sem executar (também usado pelo modo ASGI)
+    return (CarteiraDiaria
+            .insert_many([{
+                CarteiraDiaria.carteira: carteira_id,
+                CarteiraDiaria.data: data,
+                CarteiraDiaria.quantidade_cotas: quantidade_cotas,
+                CarteiraDiaria.valor_investido: valor_investido,
+                CarteiraDiaria.atualizado_em: now
+            } for carteira_id, quantidade_cotas, valor_investido in saldos])
+            .on_conflict(
+                conflict_target=[CarteiraDiaria.carteira, CarteiraDiaria.data],
+                preserve=[CarteiraDiaria.quantidade_cotas, CarteiraDiaria.valor_investido, CarteiraDiaria.atualizado_em]
+            ))
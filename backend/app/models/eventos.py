@@ -0,0 +1,40 @@
+from peewee import (
+    Model, BigAutoField, CharField, TextField, DateTimeField
+)
+from ..config.database import db
+
+class BaseModel(Model):
+    class Meta:
+        database = db
+
+class EventoCarteira(BaseModel):
+    id = BigAutoField(primary_key=True)
+    tipo = CharField(max_length=20, null=False)
+    dados = TextField(null=False)
+    criado_em = DateTimeField(null=False)
+
+    class Meta:
+        table_name = 'eventos_carteira'
+
+# Canal do LISTEN/NOTIFY; o payload é "id|tipo|dados"
+CANAL_EVENTOS = 'carteira_eventos'
+
+SQL_EMITIR = f"""
+WITH evento AS (
+    INSERT INTO eventos_carteira (tipo, dados, criado_em) VALUES (%s, %s, %s) RETURNING id, tipo, dados
+)
+SELECT id, pg_notify('{CANAL_EVENTOS}', id || '|' || tipo || '|' || dados) FROM evento
+"""
+
+
+def emitir_evento(tipo, dados, now):
+    """Grava o evento (dados já em JSON) e o publica. Chamar dentro de db.atomic(): o NOTIFY só sai no commit."""
+    if db.perfil == 'local':
+        # Perfil local (SQLite): sem NOTIFY, o evento só fica na tabela
+        return EventoCarteira.insert(tipo=tipo, dados=dados, criado_em=now).execute()
+    return db.execute_sql(SQL_EMITIR, (tipo, dados, now)).fetchone()[0]
+
+
+def emitir_recarregar(now):
+    """Publica um aviso para os clientes recarregarem o snapshot (escritas em massa, sem delta por fundo)."""
+    return emitir_evento('recarregar', '{}', now)
@@ -0,0 +1,26 @@
+from peewee import (
+    Model, BigAutoField, CharField, DecimalField, ForeignKeyField, IntegerField,
+    TextField, DateTimeField, Check
+)
+from ..config.database import db
+from .carteira import Carteira
+
+class BaseModel(Model):
+    class Meta:
+        database = db
+
+class FilaMovimentacoes(BaseModel):
+    id = BigAutoField(primary_key=True)
+    carteira = ForeignKeyField(Carteira, backref='fila', column_name='carteira_id', null=False)
+    tipo = CharField(max_length=10, null=False, constraints=[Check("tipo IN ('APORTE', 'RESGATE')")])
+    valor = DecimalField(max_digits=10, decimal_places=2, null=False, constraints=[Check('valor > 0')])
+    quantidade_cotas = DecimalField(max_digits=10, decimal_places=2, null=False, constraints=[Check('quantidade_cotas > 0')])
+    status = CharField(max_length=10, null=False, default='PENDENTE',
+                       constraints=[Check("status IN ('PENDENTE', 'CONCLUIDA', 'REJEITADA')")])
+    erro = TextField(null=True)
+    movimentacao_id = IntegerField(null=True)
+    criado_em = DateTimeField(null=False)
+    processado_em = DateTimeField(null=True)
+
+    class Meta:
+        table_name = 'fila_movimentacoes'
@@ -0,0 +1,22 @@
+from peewee import (
+    Model, CharField, IntegerField, TextField, DateTimeField, CompositeKey
+)
+from ..config.database import db
+
+class BaseModel(Model):
+    class Meta:
+        database = db
+
+class Idempotencia(BaseModel):
+    chave = CharField(max_length=255, null=False)
+    rota = CharField(max_length=100, null=False)
+    hash_requisicao = CharField(max_length=64, null=False)
+    status_code = IntegerField(null=True)
+    resposta = TextField(null=True)
+    cabecalhos = TextField(null=True)
+    criado_em = DateTimeField(null=False)
+    expira_em = DateTimeField(null=False, index=True)
+
+    class Meta:
+        table_name = 'idempotencia'
+        primary_key = CompositeKey('rota', 'chave')
@@ -1,8 +1,10 @@
 from peewee import (
     Model, IntegerField, DateField, CharField, DecimalField, ForeignKeyField,
-    DateTimeField, Check
+    DateTimeField, Check, ValuesList
 )
 from datetime import datetime
+from decimal import Decimal, ROUND_HALF_UP
+import math
 from ..config.database import db
 from .carteira import Carteira
 
@@ -17,7 +19,52 @@ class Movimentacoes(BaseModel):
     tipo = CharField(max_length=10, null=False, constraints=[Check("tipo IN ('APORTE', 'RESGATE')")])
     valor = DecimalField(max_digits=10, decimal_places=2, null=False, constraints=[Check('valor > 0')])
     quantidade_cotas = DecimalField(max_digits=10, decimal_places=2, null=False, constraints=[Check('quantidade_cotas > 0')])
+    # Saldo do fundo logo após esta movimentação
+    saldo_cotas = DecimalField(max_digits=10, decimal_places=2, null=False)
+    saldo_investido = DecimalField(max_digits=10, decimal_places=2, null=False)
     criado_em = DateTimeField(null=False)
 
     class Meta:
-        table_name = 'movimentacoes'
\ No newline at end of file
+        table_name = 'movimentacoes'
+
+CENTAVOS = Decimal('0.01')
+
+
+def quantizar(valor):
+    # Mesmo arredondamento do PostgreSQL ao gravar em DECIMAL(10,2)
+    return valor.quantize(CENTAVOS, rounding=ROUND_HALF_UP)
+
+
+def positivo_em_centavos(valor):
+    # Número (JSON) finito que continua > 0 depois de arredondado para centavos, como será
+    # gravado: valores como 0.001 virariam 0.00 e violariam o CHECK (> 0) do banco
+    return (isinstance(valor, (int, float)) and not isinstance(valor, bool)
+            and math.isfinite(valor) and quantizar(Decimal(str(valor))) > 0)
+
+
+def aplicar_movimentacao(quantidade_cotas, valor_investido, tipo, quantidade, valor):
+    """Retorna o saldo (quantidade_cotas, valor_investido) após uma movimentação.
+
+    No resgate o valor investido é reduzido proporcionalmente às cotas resgatadas,
+    a mesma regra do UPDATE feito em POST /api/v1/movimentacoes.
+    Levanta ValueError se não houver cotas suficientes para o resgate.
+    """
+    if tipo == 'APORTE':
+        return quantidade_cotas + quantidade, valor_investido + valor
+    if quantidade > quantidade_cotas:
+        raise ValueError('Quantidade de cotas insuficiente para resgate')
+    valor_proporcional = quantidade / quantidade_cotas * valor_investido
+    return quantidade_cotas - quantidade, quantizar(valor_investido - valor_proporcional)
+
+
+def gravar_saldos_movimentacoes(linhas):
+    """Regrava saldo_cotas/saldo_investido num único UPDATE ... FROM (VALUES ...).
+
+    linhas: lista de (id, saldo_cotas, saldo_investido).
+    """
+    valores = ValuesList(linhas, columns=('id', 'saldo_cotas', 'saldo_investido'), alias='v')
+    (Movimentacoes
+     .update(saldo_cotas=valores.c.saldo_cotas, saldo_investido=valores.c.saldo_investido)
+     .from_(valores)
+     .where(Movimentacoes.id == valores.c.id)
+     .execute())
@@ -0,0 +1,86 @@
+from decimal import Decimal
+import peewee
+from .carteira import Carteira
+from .carteira_diaria import registrar_saldo_diario
+from .movimentacoes import Movimentacoes, aplicar_movimentacao, quantizar
+
+
+def registrar_operacoes(operacoes, now, tudo_ou_nada=True):
+    """Registra várias movimentações com um número fixo de queries. Chamar dentro de db.atomic().
+
+    operacoes: lista de dicts com carteira_id, tipo, quantidade e valor, aplicados na ordem da lista.
+    Bloqueia as carteiras envolvidas, aplica as operações em memória, insere todas as
+    movimentações num único INSERT ... RETURNING e grava os saldos num único UPDATE ... FROM (VALUES ...).
+    Com tudo_ou_nada, qualquer erro impede a gravação de todo o lote.
+
+    Devolve (ids, erros, saldos): ids e erros indexados pela posição da operação, saldos por carteira_id.
+    """
+    hoje = now.date()
+    carteira_ids = sorted({op['carteira_id'] for op in operacoes})
+
+    # Bloquear as carteiras envolvidas (em ordem de id, evitando deadlocks)
+    saldos = {
+        cid: (quantidade_cotas, valor_investido)
+        for cid, quantidade_cotas, valor_investido in (Carteira
+                                                       .select(Carteira.id, Carteira.quantidade_cotas, Carteira.valor_investido)
+                                                       .where(Carteira.id.in_(carteira_ids))
+                                                       .order_by(Carteira.id)
+                                                       .for_update()
+                                                       .tuples())
+    }
+
+    # Aplicar as operações em memória, na ordem recebida
+    erros, posicoes, linhas, alteradas = {}, [], [], set()
+    for i, op in enumerate(operacoes):
+        saldo = saldos.get(op['carteira_id'])
+        if saldo is None:
+            erros[i] = 'Carteira não encontrada'
+            continue
+        quantidade = quantizar(Decimal(str(op['quantidade'])))
+        valor = quantizar(Decimal(str(op['valor'])))
+        try:
+            saldo = saldos[op['carteira_id']] = aplicar_movimentacao(*saldo, op['tipo'], quantidade, valor)
+        except ValueError as e:
+            erros[i] = str(e)
+            continue
+        alteradas.add(op['carteira_id'])
+        posicoes.append(i)
+        linhas.append({
+            Movimentacoes.carteira: op['carteira_id'],
+            Movimentacoes.data_operacao: hoje,
+            Movimentacoes.tipo: op['tipo'],
+            Movimentacoes.valor: valor,
+            Movimentacoes.quantidade_cotas: quantidade,
+            Movimentacoes.saldo_cotas: saldo[0],
+            Movimentacoes.saldo_investido: saldo[1],
+            Movimentacoes.criado_em: now
+        })
+
+    saldos = {cid: saldos[cid] for cid in sorted(alteradas)}
+    if not linhas or (erros and tudo_ou_nada):
+        return {}, erros, saldos
+
+    # Inserir todas as movimentações num único INSERT ... RETURNING
+    ids = dict(zip(posicoes, (row[0] for row in (Movimentacoes
+                                                 .insert_many(linhas)
+                                                 .returning(Movimentacoes.id)
+                                                 .tuples()
+                                                 .execute()))))
+
+    # Atualizar os saldos num único UPDATE ... FROM (VALUES ...)
+    valores = peewee.ValuesList(
+        [(cid, *saldo) for cid, saldo in saldos.items()],
+        columns=('id', 'quantidade_cotas', 'valor_investido'),
+        alias='v'
+    )
+    (Carteira
+     .update(quantidade_cotas=valores.c.quantidade_cotas,
+             valor_investido=valores.c.valor_investido,
+             atualizado_em=now)
+     .from_(valores)
+     .where(Carteira.id == valores.c.id)
+     .execute())
+
+    # Atualizar o saldo do dia na série histórica
+    registrar_saldo_diario([(cid, *saldo) for cid, saldo in saldos.items()], hoje, now)
+    return ids, erros, saldos
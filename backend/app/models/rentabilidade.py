@@ -0,0 +1,173 @@
+"""Rentabilidade por fundo e da carteira: XIRR (ponderada pelo dinheiro) e TWR (ponderada pelo tempo).
+
+Os fluxos são carregados de uma vez, agregados por (fundo, dia), e todos os fundos
+são resolvidos juntos com operações vetorizadas do NumPy: cada iteração do Newton
+da XIRR avalia o valor presente de todos os fundos com um np.bincount.
+
+A TWR usa o preço da cota implícito em cada dia com movimentação (valor / cotas)
+e o valor_cota atual como preço final, encadeando os subperíodos entre os dias.
+"""
+from datetime import date
+from ..config.database import db
+from .carteira import Carteira
+
+SQL_FLUXOS = """
+SELECT carteira_id, %s::DATE - data_operacao,
+       SUM(CASE WHEN tipo = 'APORTE' THEN valor ELSE -valor END)::FLOAT8,
+       SUM(CASE WHEN tipo = 'APORTE' THEN quantidade_cotas ELSE -quantidade_cotas END)::FLOAT8,
+       (SUM(valor) / SUM(quantidade_cotas))::FLOAT8
+FROM movimentacoes
+GROUP BY carteira_id, data_operacao
+ORDER BY carteira_id, data_operacao
+"""
+
+# Intervalo de busca da XIRR em ln(1 + taxa): de -99,995% a +2,2 milhões % ao ano
+XIRR_LIMITE = 10.0
+XIRR_ITERACOES = 100
+XIRR_TOLERANCIA = 1e-10
+
+
+def numpy_ou_erro():
+    try:
+        import numpy
+    except ImportError:
+        raise RuntimeError('Este recurso requer o pacote numpy instalado')
+    return numpy
+
+
+def xirr(np, grupo, fluxo, anos, n):
+    """Taxa interna de retorno anual de n grupos de fluxos, resolvidos ao mesmo tempo.
+
+    fluxo: valores do ponto de vista do investidor (aportes negativos; resgates e valor final positivos).
+    anos: tempo de cada fluxo até a data final. A equação é resolvida em x = ln(1 + taxa)
+    por Newton, com bissecção quando o passo sai do intervalo que contém a raiz.
+    Grupos sem troca de sinal no intervalo ficam NaN.
+    """
+    def valor_futuro(x):
+        fator = np.exp(x[grupo] * anos)
+        return np.bincount(grupo, fluxo * fator, n), np.bincount(grupo, fluxo * anos * fator, n)
+
+    lo = np.full(n, -XIRR_LIMITE)
+    hi = np.full(n, XIRR_LIMITE)
+    f_lo, _ = valor_futuro(lo)
+    f_hi, _ = valor_futuro(hi)
+    valido = np.sign(f_lo) * np.sign(f_hi) < 0
+
+    x = np.zeros(n)
+    for _ in range(XIRR_ITERACOES):
+        f, df = valor_futuro(x)
+        # Encolher o intervalo mantendo a troca de sinal entre lo e hi
+        lado_lo = np.sign(f) == np.sign(f_lo)
+        lo, f_lo = np.where(lado_lo, x, lo), np.where(lado_lo, f, f_lo)
+        hi = np.where(lado_lo, hi, x)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            proximo = x - f / df
+        fora = ~np.isfinite(proximo) | (proximo <= lo) | (proximo >= hi)
+        proximo = np.where(fora, (lo + hi) / 2, proximo)
+        convergiu = np.abs(proximo - x) < XIRR_TOLERANCIA
+        x = proximo
+        if convergiu[valido].all():
+            break
+    return np.where(valido, np.expm1(x), np.nan)
+
+
+def _anualizar(np, retorno, dias):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(dias > 0, np.power(1 + retorno, 365.0 / np.maximum(dias, 1)) - 1, np.nan)
+
+
+def calcular_rentabilidade(hoje=None):
+    """Devolve (fundos, carteira): XIRR, TWR e TWR anualizada de cada fundo e da carteira inteira."""
+    np = numpy_ou_erro()
+    hoje = hoje or date.today()
+
+    fundos = list(Carteira
+                  .select(Carteira.id, Carteira.nome, Carteira.quantidade_cotas, Carteira.valor_cota)
+                  .order_by(Carteira.nome)
+                  .tuples())
+    n = len(fundos)
+    ids = np.array([row[0] for row in fundos], dtype=np.int64)
+    ordem_ids = np.argsort(ids)
+    cotas_finais = np.array([float(row[2]) for row in fundos])
+    valor_cota = np.array([float(row[3]) for row in fundos])
+
+    # Uma linha por (fundo, dia), já em colunas: carteira_id, dias até hoje, fluxo, cotas e preço do dia
+    carteira_id, dia, fluxo, cotas_dia, preco = np.array(
+        db.execute_sql(SQL_FLUXOS, (hoje,)).fetchall(), dtype=np.float64
+    ).reshape(-1, 5).T
+    grupo = ordem_ids[np.searchsorted(ids[ordem_ids], carteira_id.astype(np.int64))]
+    m = len(grupo)
+
+    novo = np.ones(m, dtype=bool)
+    novo[1:] = grupo[1:] != grupo[:-1]
+    inicio = np.flatnonzero(novo)
+    fim = np.r_[inicio[1:] - 1, m - 1] if m else inicio
+    tem_fluxo = np.zeros(n, dtype=bool)
+    tem_fluxo[grupo[inicio]] = True
+    primeiro_dia = np.zeros(n)
+    primeiro_dia[grupo[inicio]] = dia[inicio]
+
+    # XIRR: fluxos do investidor mais o valor de mercado hoje; o grupo n é a carteira inteira
+    valor_final = cotas_finais * valor_cota
+    anos = dia / 365.0
+    taxas = xirr(
+        np,
+        np.r_[grupo, np.arange(n), np.full(m, n), n],
+        np.r_[-fluxo, valor_final, -fluxo, valor_final.sum()],
+        np.r_[anos, np.zeros(n), anos, 0.0],
+        n + 1
+    )
+
+    # TWR por fundo: preço de cada dia sobre o do dia anterior com movimentação, só com cotas em carteira
+    soma = np.cumsum(cotas_dia)
+    cotas_depois = soma - (soma[inicio] - cotas_dia[inicio])[np.cumsum(novo) - 1] if m else soma
+    cotas_antes = cotas_depois - cotas_dia
+    preco_anterior = np.r_[np.nan, preco[:-1]][:m]
+    preco_anterior[inicio] = np.nan
+    with np.errstate(divide='ignore', invalid='ignore'):
+        fator = np.where(novo | (cotas_antes <= 0), 1.0, preco / preco_anterior)
+        fator_final = np.where(tem_fluxo & (cotas_finais > 0), valor_cota / _por_fundo(np, preco, grupo, fim, n), 1.0)
+    twr = np.exp(np.bincount(grupo, np.log(fator), n)) * fator_final - 1
+    twr = np.where(tem_fluxo, twr, np.nan)
+
+    # TWR da carteira: valor antes dos fluxos de cada dia sobre o valor depois dos fluxos do dia anterior
+    reavaliacao = np.where(novo, 0.0, cotas_antes * (preco - np.nan_to_num(preco_anterior)))
+    dias, por_dia = np.unique(dia, return_inverse=True)
+    dias, por_dia = dias[::-1], len(dias) - 1 - por_dia  # do dia mais antigo para o mais recente
+    k = len(dias)
+    reavaliado = np.bincount(por_dia, reavaliacao, k)
+    aplicado = np.bincount(por_dia, cotas_dia * preco, k)
+    depois = np.cumsum(reavaliado + aplicado)
+    antes = depois - aplicado
+    anterior = np.r_[0.0, depois[:-1]]
+    reavaliacao_final = (cotas_finais * (valor_cota - _por_fundo(np, preco, grupo, fim, n)))[tem_fluxo].sum()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        fatores = np.where(anterior > 0, antes / anterior, 1.0)
+        final = (depois[-1] + reavaliacao_final) / depois[-1] if k and depois[-1] > 0 else 1.0
+    twr_carteira = np.prod(fatores) * final - 1 if k else np.nan
+
+    twr_anual = _anualizar(np, np.r_[twr, twr_carteira], np.r_[primeiro_dia, dias[0] if k else 0])
+    resultado = [{
+        'id': row[0],
+        'fundName': row[1],
+        'xirr': _numero(taxas[i]),
+        'twr': _numero(twr[i]),
+        'twrAnnualized': _numero(twr_anual[i])
+    } for i, row in enumerate(fundos)]
+    carteira = {
+        'xirr': _numero(taxas[n]),
+        'twr': _numero(twr_carteira),
+        'twrAnnualized': _numero(twr_anual[n])
+    }
+    return resultado, carteira
+
+
+def _por_fundo(np, valores, grupo, posicoes, n):
+    # Valor na posição indicada de cada fundo (NaN para fundos sem linhas)
+    saida = np.full(n, np.nan)
+    saida[grupo[posicoes]] = valores[posicoes]
+    return saida
+
+
+def _numero(valor):
+    return None if valor != valor else round(float(valor), 6)
@@ -0,0 +1,73 @@
+from flask import make_response
+from flask_restful import Resource, request
+from ..config.cache import snapshot_cache
+from ..config.database import db, logger
+from ..models.carteira import Carteira, VALOR_MERCADO
+from .serializacao import compilar_objeto, lista, linhas, numero
+import peewee
+
+# Tamanho padrão do prefixo do ticker (a raiz do código de negociação, ex.: PETR de PETR4)
+ALOCACAO_PREFIXO = 4
+
+serializar_grupo = compilar_objeto([
+    ('group', 'texto'),
+    ('count', 'int'),
+    ('invested', 'decimal'),
+    ('marketValue', 'decimal'),
+    ('percentage', 'decimal'),
+], nulos=('percentage',))
+
+RESPOSTA_GET = '{"groupBy":%s,"total":{"count":%d,"invested":%s,"marketValue":%s},"allocation":%s}'
+
+
+def _build_alocacao(agrupamento, prefixo):
+    grupo = Carteira.tipo if agrupamento == 'type' else peewee.fn.UPPER(peewee.fn.SUBSTR(Carteira.ticker, 1, prefixo))
+    valor_mercado = peewee.fn.SUM(VALOR_MERCADO)
+
+    # Uma linha por grupo; o percentual usa o total de todos os grupos (janela sobre o agregado)
+    grupos = linhas(db, Carteira
+                    .select(grupo, peewee.fn.COUNT(Carteira.id), peewee.fn.SUM(Carteira.valor_investido), valor_mercado,
+                            peewee.fn.ROUND(100 * valor_mercado / peewee.fn.NULLIF(peewee.fn.SUM(valor_mercado).over(), 0), 2))
+                    .group_by(grupo)
+                    .order_by(valor_mercado.desc(), grupo))
+
+    return RESPOSTA_GET % (
+        '"type"' if agrupamento == 'type' else '"tickerPrefix"',
+        sum(row[1] for row in grupos),
+        numero(sum(row[2] for row in grupos)),
+        numero(sum(row[3] for row in grupos)),
+        lista(serializar_grupo, grupos)
+    )
+
+
+class AlocacaoResource(Resource):
+    def get(self):
+        try:
+            # Validar parâmetros
+            agrupamento = request.args.get('groupBy', 'type')
+            if agrupamento not in ('type', 'tickerPrefix'):
+                return {'error': 'groupBy deve ser type ou tickerPrefix'}, 400
+            try:
+                prefixo = int(request.args.get('prefixLength', ALOCACAO_PREFIXO))
+            except ValueError:
+                return {'error': 'prefixLength deve ser um inteiro'}, 400
+            if not 1 <= prefixo <= 10:
+                return {'error': 'prefixLength deve estar entre 1 e 10'}, 400
+
+            # Resultado em cache, invalidado pelas mesmas escritas que o snapshot da carteira
+            nome = 'alocacao:type' if agrupamento == 'type' else f'alocacao:tickerPrefix:{prefixo}'
+            with db.primario():
+                snapshot = snapshot_cache.get_or_build(nome, lambda: _build_alocacao(agrupamento, prefixo))
+
+            if request.if_none_match.contains(snapshot['etag']):
+                response = make_response('', 304)
+            else:
+                response = make_response(snapshot['body'], 200)
+                response.mimetype = 'application/json'
+            response.set_etag(snapshot['etag'])
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+
+        except Exception as e:
+            logger.error(f"Erro no GET /api/v1/carteira/allocation: {str(e)}")
+            return {'error': str(e)}, 500
@@ -0,0 +1,95 @@
+from flask import make_response
+from flask_restful import Resource, request
+from ..config.cache import MemoryCacheBackend, snapshot_cache
+from ..config.database import db, logger
+from ..models.carteira import Carteira
+from .serializacao import compilar_objeto, lista, linhas
+import os
+import peewee
+
+# Resultados devolvidos por padrão e no máximo
+BUSCA_LIMITE = int(os.environ.get('BUSCA_LIMITE', 10))
+BUSCA_LIMITE_MAX = 50
+# Consultas guardadas no cache por processo e por quanto tempo (s)
+BUSCA_CACHE_MAXSIZE = int(os.environ.get('BUSCA_CACHE_MAXSIZE', 1024))
+BUSCA_CACHE_TTL = float(os.environ.get('BUSCA_CACHE_TTL', 30))
+# Abaixo deste tamanho só há busca por prefixo (trigramas precisam de 3 letras)
+BUSCA_MINIMO_APROXIMADA = 3
+BUSCA_TAMANHO_MAX = 100
+
+serializar_resultado = compilar_objeto([
+    ('id', 'int'),
+    ('fundName', 'texto'),
+    ('ticker', 'texto'),
+    ('type', 'texto'),
+])
+
+# Consultas repetidas da digitação (o mesmo prefixo de vários usuários) não vão ao banco
+busca_cache = MemoryCacheBackend(BUSCA_CACHE_MAXSIZE)
+
+
+def _escapar_like(valor):
+    return valor.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def _buscar(termo, tipo, limite):
+    nome = peewee.fn.LOWER(Carteira.nome)
+    ticker = peewee.fn.LOWER(Carteira.ticker)
+    prefixo = _escapar_like(termo) + '%'
+
+    # Prefixo pelos índices text_pattern_ops; aproximada pelos índices de trigramas
+    condicao = (nome % prefixo) | (ticker % prefixo)
+    if len(termo) >= BUSCA_MINIMO_APROXIMADA:
+        # Operadores do pg_trgm com % dobrado, por causa dos parâmetros do psycopg2
+        condicao |= (peewee.Expression(termo, '<%%', Carteira.nome) |
+                     peewee.Expression(Carteira.ticker, '%%', peewee.Value(termo)))
+    if tipo:
+        condicao &= Carteira.tipo == tipo
+
+    # Ticker exato, prefixo do ticker, prefixo do nome e, por fim, semelhança
+    prioridade = peewee.Case(None, [
+        (ticker == termo, 3),
+        (ticker % prefixo, 2),
+        (nome % prefixo, 1),
+    ], 0)
+    semelhanca = peewee.fn.GREATEST(peewee.fn.word_similarity(termo, Carteira.nome),
+                                    peewee.fn.similarity(Carteira.ticker, termo))
+    query = (Carteira
+             .select(Carteira.id, Carteira.nome, Carteira.ticker, Carteira.tipo)
+             .where(condicao)
+             .order_by(prioridade.desc(), semelhanca.desc(), Carteira.nome)
+             .limit(limite))
+    return '{"results":' + lista(serializar_resultado, linhas(db, query)) + '}'
+
+
+class BuscaResource(Resource):
+    def get(self):
+        try:
+            # Validar parâmetros
+            termo = ' '.join(request.args.get('q', '').split()).lower()
+            if not termo:
+                return {'error': 'Informe o termo de busca em q'}, 400
+            if len(termo) > BUSCA_TAMANHO_MAX:
+                return {'error': f'q excede o tamanho máximo de {BUSCA_TAMANHO_MAX} caracteres'}, 400
+            tipo = request.args.get('tipo') or None
+            try:
+                limite = int(request.args.get('limit', BUSCA_LIMITE))
+            except ValueError:
+                return {'error': 'limit deve ser um inteiro'}, 400
+            if not 1 <= limite <= BUSCA_LIMITE_MAX:
+                return {'error': f'limit deve estar entre 1 e {BUSCA_LIMITE_MAX}'}, 400
+
+            # A geração do snapshot entra na chave: qualquer escrita descarta as consultas em cache
+            chave = f'{snapshot_cache.generation()}:{limite}:{tipo or ""}:{termo}'
+            body = busca_cache.get(chave)
+            if body is None:
+                body = _buscar(termo, tipo, limite)
+                busca_cache.set(chave, body, BUSCA_CACHE_TTL)
+
+            response = make_response(body, 200)
+            response.mimetype = 'application/json'
+            return response
+
+        except Exception as e:
+            logger.error(f"Erro no GET /api/v1/carteira/search: {str(e)}")
+            return {'error': str(e)}, 500
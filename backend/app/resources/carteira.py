@@ -1,82 +1,182 @@
+from flask import make_response
 from flask_restful import Resource, request
+from ..config.cache import snapshot_cache
 from ..config.database import db, logger
-from ..models.carteira import Carteira
+from ..models.carteira import Carteira, VALOR_MERCADO
+from ..models.eventos import emitir_evento
 from ..models.movimentacoes import Movimentacoes
+from .idempotencia import idempotente
+from .serializacao import compilar_objeto, lista, linhas, numero
 from datetime import datetime
 import peewee
 
+serializar_fundo = compilar_objeto([
+    ('id', 'int'),
+    ('date', 'data'),
+    ('fundName', 'texto'),
+    ('type', 'texto'),
+    ('quantity', 'decimal'),
+    ('amount', 'decimal'),
+    ('marketValue', 'decimal'),
+    ('unrealizedPnl', 'decimal'),
+])
+
+serializar_movimentacao = compilar_objeto([
+    ('id', 'int'),
+    ('date', 'data'),
+    ('fundName', 'texto'),
+    ('type', 'texto'),
+    ('quantity', 'decimal'),
+    ('amount', 'decimal'),
+])
+
+RESUMO = '{"invested":%s,"marketValue":%s,"unrealizedPnl":%s}'
+RESPOSTA_GET = '{"portfolioSummary":%s,"portfolio":%s,"recentTransactions":%s}'
+EVENTO_FUNDO = '{"fund":%s,"transaction":%s}'
+
+
+def consulta_resumo():
+    # Saldo total e valor de mercado, calculados no banco
+    return Carteira.select(
+        peewee.fn.COALESCE(peewee.fn.SUM(Carteira.valor_investido), 0),
+        peewee.fn.COALESCE(peewee.fn.SUM(VALOR_MERCADO), 0)
+    )
+
+
+def formatar_resumo(row):
+    investido, valor_mercado = row
+    return RESUMO % (numero(investido), numero(valor_mercado), numero(valor_mercado - investido))
+
+
+def _resumo():
+    # Saldo total, valor de mercado e resultado não realizado
+    return formatar_resumo(linhas(db, consulta_resumo())[0])
+
+
+def consulta_fundos():
+    # Fundos da carteira (apenas as colunas usadas, como tuplas)
+    return (Carteira
+            .select(Carteira.id, Carteira.atualizado_em, Carteira.nome, Carteira.tipo,
+                    Carteira.quantidade_cotas, Carteira.valor_investido,
+                    VALOR_MERCADO, VALOR_MERCADO - Carteira.valor_investido)
+            .order_by(Carteira.nome))
+
+
+def evento_fundo(carteira_id, now, movimentacao=None):
+    """Publica a alteração de um fundo para o stream de eventos. Chamar dentro do db.atomic() da escrita.
+
+    O evento traz só o fundo (como em portfolio) e a movimentação nova, se houver: os
+    totais não vão no evento porque, calculados dentro da transação, não veriam as
+    escritas concorrentes em outros fundos; o cliente os recalcula a partir de portfolio.
+    movimentacao: (id, data_operacao, tipo, quantidade_cotas, valor).
+    """
+    fundo = linhas(db, consulta_fundos().where(Carteira.id == carteira_id))[0]
+    return emitir_evento(*formatar_evento_fundo(fundo, movimentacao), now)
+
+
+def formatar_evento_fundo(fundo, movimentacao):
+    # (tipo, dados) do evento, a partir da linha de consulta_fundos()
+    if movimentacao is None:
+        return 'fundo', EVENTO_FUNDO % (serializar_fundo(fundo), 'null')
+    id_, data_operacao, tipo, quantidade_cotas, valor = movimentacao
+    transacao = serializar_movimentacao((id_, data_operacao, fundo[2], tipo, quantidade_cotas, valor))
+    return 'movimentacao', EVENTO_FUNDO % (serializar_fundo(fundo), transacao)
+
+
+def consulta_ultimas_movimentacoes():
+    # Últimas movimentações, para recentTransactions
+    return (Movimentacoes
+            .select(Movimentacoes.id, Movimentacoes.data_operacao, Carteira.nome, Movimentacoes.tipo,
+                    Movimentacoes.quantidade_cotas, Movimentacoes.valor)
+            .join(Carteira)
+            .order_by(Movimentacoes.data_operacao.desc(), Movimentacoes.id.desc())
+            .limit(5))
+
+
+def validar_fundo(data):
+    """Mensagem de erro do corpo do POST /api/v1/carteira, ou None se for válido."""
+    if not data:
+        return 'Nenhum dado fornecido'
+
+    # Validar campos obrigatórios
+    required_fields = ['name', 'ticker', 'type', 'quoteValue']
+    for field in required_fields:
+        if field not in data:
+            return f'Campo {field} é obrigatório'
+
+    # Validar valores
+    if not isinstance(data['quoteValue'], (int, float)) or data['quoteValue'] <= 0:
+        return 'quoteValue deve ser um número positivo'
+    if len(data['name']) > 100:
+        return 'name excede o tamanho máximo de 100 caracteres'
+    if len(data['ticker']) > 10:
+        return 'ticker excede o tamanho máximo de 10 caracteres'
+    if len(data['type']) > 50:
+        return 'type excede o tamanho máximo de 50 caracteres'
+    return None
+
+
+def resposta_fundo(id_, nome, ticker, tipo, valor_cota, now):
+    # Corpo da resposta do POST /api/v1/carteira (fundo novo, ainda sem cotas)
+    return {
+        'id': id_,
+        'name': nome,
+        'ticker': ticker,
+        'type': tipo,
+        'quoteValue': float(valor_cota),
+        'quantity': 0.0,
+        'amount': 0.0,
+        'createdAt': now.strftime('%Y-%m-%d %H:%M:%S'),
+        'updatedAt': now.strftime('%Y-%m-%d %H:%M:%S')
+    }
+
 class CarteiraResource(Resource):
+    method_decorators = {'post': [idempotente]}
+
     def get(self):
         try:
-            # Calcular saldo total
-            saldo_total = Carteira.select(peewee.fn.SUM(Carteira.valor_investido).alias('saldo_total')).scalar() or 0
-
-            # Listar fundos na carteira
-            fundos = []
-            for fundo in Carteira.select().order_by(Carteira.nome):
-                fundos.append({
-                    'id': fundo.id,
-                    'date': fundo.atualizado_em.strftime('%Y-%m-%d') if hasattr(fundo.atualizado_em, 'strftime') else str(fundo.atualizado_em),
-                    'fundName': fundo.nome,
-                    'type': fundo.tipo,
-                    'quantity': float(fundo.quantidade_cotas),
-                    'amount': float(fundo.valor_investido)
-                })
-
-            # Listar últimas movimentações
-            movimentacoes = []
-            query = (Movimentacoes
-                     .select(Movimentacoes, Carteira)
-                     .join(Carteira)
-                     .order_by(Movimentacoes.data_operacao.desc())
-                     .limit(5))
-            for mov in query:
-                movimentacoes.append({
-                    'id': mov.id,
-                    'date': mov.data_operacao.strftime('%Y-%m-%d') if hasattr(mov.data_operacao, 'strftime') else str(mov.data_operacao),
-                    'fundName': mov.carteira.nome,
-                    'type': mov.tipo,
-                    'quantity': float(mov.quantidade_cotas),
-                    'amount': float(mov.valor)
-                })
-
-            # Montar resposta JSON
-            response = {
-                'portfolioSummary': {
-                    'invested': float(saldo_total)
-                },
-                'portfolio': fundos,
-                'recentTransactions': movimentacoes
-            }
-
-            return response, 200
+            # Snapshot serializado em cache, invalidado pelos POSTs
+            # O snapshot vai para o cache: montado no primário para não guardar leitura atrasada
+            with db.primario():
+                snapshot = snapshot_cache.get_or_build('carteira', self._build_snapshot)
+
+            if request.if_none_match.contains(snapshot['etag']):
+                response = make_response('', 304)
+            else:
+                response = make_response(snapshot['body'], 200)
+                response.mimetype = 'application/json'
+            response.set_etag(snapshot['etag'])
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
 
         except Exception as e:
             logger.error(f"Erro no GET /api/v1/carteira: {str(e)}")
             return {'error': str(e)}, 500
 
+    def _build_snapshot(self):
+        # Calcular saldo total, valor de mercado e resultado não realizado
+        resumo = _resumo()
+
+        # Listar fundos na carteira
+        fundos = linhas(db, consulta_fundos())
+
+        # Listar últimas movimentações
+        movimentacoes = linhas(db, consulta_ultimas_movimentacoes())
+
+        # Montar resposta JSON
+        return RESPOSTA_GET % (
+            resumo,
+            lista(serializar_fundo, fundos),
+            lista(serializar_movimentacao, movimentacoes)
+        )
+
     def post(self):
         try:
-            # Obter os dados do JSON
+            # Obter e validar os dados do JSON
             data = request.get_json()
-            if not data:
-                return {'error': 'Nenhum dado fornecido'}, 400
-
-            # Validar campos obrigatórios
-            required_fields = ['name', 'ticker', 'type', 'quoteValue']
-            for field in required_fields:
-                if field not in data:
-                    return {'error': f'Campo {field} é obrigatório'}, 400
-
-            # Validar valores
-            if not isinstance(data['quoteValue'], (int, float)) or data['quoteValue'] <= 0:
-                return {'error': 'quoteValue deve ser um número positivo'}, 400
-            if len(data['name']) > 100:
-                return {'error': 'name excede o tamanho máximo de 100 caracteres'}, 400
-            if len(data['ticker']) > 10:
-                return {'error': 'ticker excede o tamanho máximo de 10 caracteres'}, 400
-            if len(data['type']) > 50:
-                return {'error': 'type excede o tamanho máximo de 50 caracteres'}, 400
+            erro = validar_fundo(data)
+            if erro:
+                return {'error': erro}, 400
 
             # Criar novo registro na tabela carteira
             with db.atomic():
@@ -93,18 +193,14 @@ class CarteiraResource(Resource):
                     atualizado_em=now
                 )
 
+                # Publicar o fundo novo para o stream de eventos (entregue no commit)
+                evento_fundo(carteira.id, now)
+
+            # Invalidar o snapshot do GET /api/v1/carteira
+            snapshot_cache.invalidate()
+
             # Montar resposta com os dados do registro criado
-            response = {
-                'id': carteira.id,
-                'name': carteira.nome,
-                'ticker': carteira.ticker,
-                'type': carteira.tipo,
-                'quoteValue': float(carteira.valor_cota),
-                'quantity': float(carteira.quantidade_cotas),
-                'amount': float(carteira.valor_investido),
-                'createdAt': carteira.criado_em.strftime('%Y-%m-%d %H:%M:%S'),
-                'updatedAt': carteira.atualizado_em.strftime('%Y-%m-%d %H:%M:%S')
-            }
+            response = resposta_fundo(carteira.id, carteira.nome, carteira.ticker, carteira.tipo, carteira.valor_cota, now)
 
             logger.info(f"Registro criado na carteira: {response}")
             return response, 201
@@ -0,0 +1,63 @@
+from flask_restful import Resource, request
+from ..config.cache import snapshot_cache
+from ..config.database import db, logger
+from ..models.carteira import Carteira
+from ..models.eventos import emitir_recarregar
+from ..models.movimentacoes import positivo_em_centavos, quantizar
+from datetime import datetime
+from decimal import Decimal
+import os
+import peewee
+
+# Máximo de cotações por requisição
+COTACOES_MAX = int(os.environ.get('COTACOES_MAX', 50000))
+
+
+class CotacoesResource(Resource):
+    def put(self):
+        try:
+            # Obter o mapa ticker -> valor_cota
+            data = request.get_json()
+            if not data or not isinstance(data, dict):
+                return {'error': 'Envie um objeto {ticker: valor_cota}'}, 400
+            if len(data) > COTACOES_MAX:
+                return {'error': f'Máximo de {COTACOES_MAX} cotações por requisição'}, 400
+
+            # Validar valores
+            for ticker, valor_cota in data.items():
+                if len(ticker) > 10:
+                    return {'error': f'ticker {ticker} excede o tamanho máximo de 10 caracteres'}, 400
+                if not positivo_em_centavos(valor_cota):
+                    return {'error': f'valor_cota de {ticker} deve ser um número positivo (mínimo 0.01)'}, 400
+
+            now = datetime.now()
+
+            # Aplicar todas as cotações num único UPDATE ... FROM (VALUES ...), casando pelo ticker
+            valores = peewee.ValuesList(
+                [(ticker, quantizar(Decimal(str(valor_cota)))) for ticker, valor_cota in data.items()],
+                columns=('ticker', 'valor_cota'),
+                alias='v'
+            )
+            with db.atomic():
+                atualizados = {row[0] for row in (Carteira
+                                                  .update(valor_cota=valores.c.valor_cota, atualizado_em=now)
+                                                  .from_(valores)
+                                                  .where(Carteira.ticker == valores.c.ticker)
+                                                  .returning(Carteira.ticker)
+                                                  .tuples()
+                                                  .execute())}
+                emitir_recarregar(now)
+
+            # Invalidar o snapshot do GET /api/v1/carteira
+            snapshot_cache.invalidate()
+
+            response = {
+                'atualizados': len(atualizados),
+                'nao_encontrados': sorted(set(data) - atualizados)
+            }
+            logger.info(f"Cotações atualizadas: {len(atualizados)} de {len(data)}")
+            return response, 200
+
+        except Exception as e:
+            logger.error(f"Erro no PUT /api/v1/carteira/cotacoes: {str(e)}")
+            return {'error': str(e)}, 500
@@ -0,0 +1,97 @@
+from flask import Response, stream_with_context
+from flask_restful import Resource, request
+from ..config.database import db, logger
+from ..config.eventos import OuvinteEventos
+from ..models.eventos import CANAL_EVENTOS, EventoCarteira
+import os
+import peewee
+import queue
+
+# Intervalo (s) entre heartbeats quando não há eventos
+EVENTOS_HEARTBEAT = float(os.environ.get('EVENTOS_HEARTBEAT', 15))
+# Máximo de eventos reenviados na retomada; acima disso o cliente recebe "recarregar"
+EVENTOS_REPLAY_MAX = int(os.environ.get('EVENTOS_REPLAY_MAX', 1000))
+# Eventos anteriores ao Last-Event-ID reenviados na retomada. Os ids (BIGSERIAL) são
+# reservados antes do commit, então um evento de id menor pode ser confirmado depois
+# de um maior já entregue; o cliente ignora os repetidos
+EVENTOS_REPLAY_SOBREPOSICAO = int(os.environ.get('EVENTOS_REPLAY_SOBREPOSICAO', 100))
+# Espera (ms) sugerida ao navegador antes de reconectar
+EVENTOS_RETRY_MS = 3000
+
+# Um LISTEN por processo, repassado a todos os clientes conectados nele
+ouvinte = OuvinteEventos(db, CANAL_EVENTOS)
+
+
+def _formatar(id_, tipo, dados):
+    return f'id: {id_}\nevent: {tipo}\ndata: {dados}\n\n'
+
+
+def _stream(fila, pendentes):
+    # Ids já enviados na retomada, que também podem chegar pela fila
+    enviados = {id_ for id_, _, _ in pendentes}
+    try:
+        yield f'retry: {EVENTOS_RETRY_MS}\n\n'
+        for id_, tipo, dados in pendentes:
+            yield _formatar(id_, tipo, dados)
+        while True:
+            try:
+                evento = fila.get(timeout=EVENTOS_HEARTBEAT)
+            except queue.Empty:
+                yield ': heartbeat\n\n'
+                continue
+            if evento is None:
+                # Cliente atrasado ou ouvinte reconectando: o navegador reconecta com Last-Event-ID
+                return
+            if evento[0] in enviados:
+                continue
+            yield _formatar(*evento)
+    finally:
+        ouvinte.cancelar(fila)
+
+
+class EventosResource(Resource):
+    def get(self):
+        try:
+            ultimo = request.headers.get('Last-Event-ID') or request.args.get('lastEventId')
+            try:
+                ultimo = int(ultimo) if ultimo else None
+            except ValueError:
+                return {'error': 'Last-Event-ID deve ser um inteiro'}, 400
+
+            # Assinar antes de ler a tabela: o que for publicado entre as duas coisas vem pela fila
+            fila = ouvinte.assinar()
+            try:
+                # No primário, para não perder eventos ainda não replicados
+                with db.primario():
+                    minimo, maximo = (EventoCarteira
+                                      .select(peewee.fn.MIN(EventoCarteira.id), peewee.fn.MAX(EventoCarteira.id))
+                                      .tuples()
+                                      .get())
+                    maximo = maximo or 0
+                    if (ultimo is None or ultimo > maximo or (minimo is not None and ultimo < minimo - 1)
+                            or maximo - ultimo > EVENTOS_REPLAY_MAX):
+                        # Conexão nova, eventos já descartados ou retomada longa demais:
+                        # o cliente recarrega o snapshot e segue a partir do último evento
+                        pendentes = [(maximo, 'recarregar', '{}')]
+                    else:
+                        # Com sobreposição, para recuperar eventos confirmados depois do Last-Event-ID
+                        pendentes = list(EventoCarteira
+                                         .select(EventoCarteira.id, EventoCarteira.tipo, EventoCarteira.dados)
+                                         .where(EventoCarteira.id > ultimo - EVENTOS_REPLAY_SOBREPOSICAO)
+                                         .order_by(EventoCarteira.id)
+                                         .tuples())
+            except Exception:
+                ouvinte.cancelar(fila)
+                raise
+            finally:
+                # O stream pode durar horas: devolver a conexão ao pool agora
+                db.close()
+
+            response = Response(stream_with_context(_stream(fila, pendentes)), mimetype='text/event-stream')
+            response.headers['Cache-Control'] = 'no-cache'
+            response.headers['X-Accel-Buffering'] = 'no'
+            return response
+
+        except Exception as e:
+            logger.error(f"Erro no GET /api/v1/carteira/eventos: {str(e)}")
+            return {'error': str(e)}, 500
@@ -0,0 +1,104 @@
+from flask import Response, stream_with_context
+from flask_restful import Resource, request
+from playhouse.postgres_ext import ServerSide
+from ..config.database import db, logger
+from ..models.carteira import Carteira
+from ..models.movimentacoes import Movimentacoes
+from datetime import datetime
+import csv
+import io
+import json
+import os
+
+# Linhas lidas do cursor no servidor a cada FETCH
+EXPORTACAO_CHUNK = int(os.environ.get('EXPORTACAO_CHUNK', 5000))
+
+COLUNAS = ['id', 'data_operacao', 'carteira_id', 'ticker', 'fundo', 'tipo', 'valor', 'quantidade_cotas', 'criado_em']
+
+
+def _formatar(row):
+    id_, data_operacao, carteira_id, ticker, fundo, tipo, valor, quantidade_cotas, criado_em = row
+    # Decimais como texto para não perder precisão
+    return [id_, data_operacao.strftime('%Y-%m-%d'), carteira_id, ticker, fundo, tipo,
+            str(valor), str(quantidade_cotas), criado_em.strftime('%Y-%m-%d %H:%M:%S')]
+
+
+def _csv(rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(COLUNAS)
+    for i, row in enumerate(rows, 1):
+        writer.writerow(_formatar(row))
+        if i % EXPORTACAO_CHUNK == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def _ndjson(rows):
+    linhas = []
+    for row in rows:
+        linhas.append(json.dumps(dict(zip(COLUNAS, _formatar(row))), ensure_ascii=False))
+        if len(linhas) == EXPORTACAO_CHUNK:
+            yield '\n'.join(linhas) + '\n'
+            linhas = []
+    if linhas:
+        yield '\n'.join(linhas) + '\n'
+
+
+FORMATOS = {
+    'csv': (_csv, 'text/csv'),
+    'ndjson': (_ndjson, 'application/x-ndjson'),
+}
+
+
+class ExportacaoResource(Resource):
+    def get(self):
+        try:
+            args = request.args
+
+            # Validar parâmetros
+            formato = args.get('formato', 'csv')
+            if formato not in FORMATOS:
+                return {'error': 'formato deve ser csv ou ndjson'}, 400
+            try:
+                data_inicio = datetime.strptime(args['data_inicio'], '%Y-%m-%d').date() if 'data_inicio' in args else None
+                data_fim = datetime.strptime(args['data_fim'], '%Y-%m-%d').date() if 'data_fim' in args else None
+            except ValueError:
+                return {'error': 'datas devem estar no formato YYYY-MM-DD'}, 400
+
+            query = (Movimentacoes
+                     .select(Movimentacoes.id, Movimentacoes.data_operacao, Carteira.id, Carteira.ticker,
+                             Carteira.nome, Movimentacoes.tipo, Movimentacoes.valor,
+                             Movimentacoes.quantidade_cotas, Movimentacoes.criado_em)
+                     .join(Carteira)
+                     .order_by(Movimentacoes.data_operacao, Movimentacoes.id)
+                     .tuples())
+            if 'carteira_id' in args:
+                try:
+                    query = query.where(Movimentacoes.carteira == int(args['carteira_id']))
+                except ValueError:
+                    return {'error': 'carteira_id deve ser um inteiro'}, 400
+            if data_inicio:
+                query = query.where(Movimentacoes.data_operacao >= data_inicio)
+            if data_fim:
+                query = query.where(Movimentacoes.data_operacao <= data_fim)
+
+            serializar, mimetype = FORMATOS[formato]
+
+            def gerar():
+                # Cursor nomeado exige transação; as linhas vêm em blocos de EXPORTACAO_CHUNK
+                with db.atomic():
+                    yield from serializar(ServerSide(query, array_size=EXPORTACAO_CHUNK))
+
+            logger.info(f"Exportando movimentações em {formato}: {dict(args)}")
+            return Response(
+                stream_with_context(gerar()),
+                mimetype=mimetype,
+                headers={'Content-Disposition': f'attachment; filename=movimentacoes.{formato}'}
+            )
+
+        except Exception as e:
+            logger.error(f"Erro no GET /api/v1/movimentacoes/exportar: {str(e)}")
+            return {'error': str(e)}, 500
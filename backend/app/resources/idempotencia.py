@@ -0,0 +1,194 @@
+import functools
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+import peewee
+from flask_restful import request
+from ..config.cache import MemoryCacheBackend
+from ..config.database import logger
+from ..models.idempotencia import Idempotencia
+
+IDEMPOTENCIA_HEADER = 'Idempotency-Key'
+# Validade de uma chave e tamanho do cache em memória
+IDEMPOTENCIA_TTL = int(os.environ.get('IDEMPOTENCIA_TTL', 24 * 3600))
+IDEMPOTENCIA_CACHE_MAX = int(os.environ.get('IDEMPOTENCIA_CACHE_MAX', 10000))
+# Quanto tempo uma repetição espera a requisição original terminar
+IDEMPOTENCIA_ESPERA = float(os.environ.get('IDEMPOTENCIA_ESPERA', 10))
+# Validade (s) de uma reserva ainda sem resposta: se o processo cair antes de gravar a
+# resposta, a chave volta a ser aceita depois disso (deve exceder a requisição mais lenta)
+IDEMPOTENCIA_RESERVA = int(os.environ.get('IDEMPOTENCIA_RESERVA', 60))
+# Intervalo (s) entre as limpezas das chaves expiradas, por processo, e linhas apagadas por vez
+IDEMPOTENCIA_LIMPEZA = float(os.environ.get('IDEMPOTENCIA_LIMPEZA', 300))
+IDEMPOTENCIA_LIMPEZA_LOTE = 1000
+
+_respostas = MemoryCacheBackend(IDEMPOTENCIA_CACHE_MAX)
+_limpeza_lock = threading.Lock()
+_proxima_limpeza = 0.0
+
+
+def reserva(rota, chave, hash_requisicao):
+    # INSERT ... ON CONFLICT DO NOTHING: só uma requisição consegue reservar a chave.
+    # A reserva expira em IDEMPOTENCIA_RESERVA; a gravação da resposta estende para IDEMPOTENCIA_TTL
+    now = datetime.now()
+    return (Idempotencia
+            .insert(chave=chave, rota=rota, hash_requisicao=hash_requisicao,
+                    criado_em=now, expira_em=now + timedelta(seconds=IDEMPOTENCIA_RESERVA))
+            .on_conflict_ignore()
+            .returning(Idempotencia.chave)
+            .tuples())
+
+
+def registro(rota, chave):
+    # (hash_requisicao, status_code, resposta, expira_em, cabecalhos) da chave
+    return (Idempotencia
+            .select(Idempotencia.hash_requisicao, Idempotencia.status_code, Idempotencia.resposta, Idempotencia.expira_em,
+                    Idempotencia.cabecalhos)
+            .where((Idempotencia.rota == rota) & (Idempotencia.chave == chave))
+            .limit(1)
+            .tuples())
+
+
+def liberacao(rota, chave, expirada=False):
+    # expirada: só apaga se a chave ainda estiver expirada (outra requisição pode tê-la reservado de novo)
+    condicao = (Idempotencia.rota == rota) & (Idempotencia.chave == chave)
+    if expirada:
+        condicao &= Idempotencia.expira_em < datetime.now()
+    return Idempotencia.delete().where(condicao)
+
+
+def gravacao(rota, chave, status, corpo, cabecalhos=None):
+    # cabecalhos: os definidos pelo resource (ex.: Location do 202), devolvidos nas repetições
+    return (Idempotencia
+            .update(status_code=status, resposta=json.dumps(corpo),
+                    cabecalhos=json.dumps(cabecalhos) if cabecalhos else None,
+                    expira_em=datetime.now() + timedelta(seconds=IDEMPOTENCIA_TTL))
+            .where((Idempotencia.rota == rota) & (Idempotencia.chave == chave)))
+
+
+def limpeza():
+    # Um lote de chaves expiradas (com ou sem resposta), pelo índice de expira_em
+    expiradas = (Idempotencia
+                 .select(Idempotencia.rota, Idempotencia.chave)
+                 .where(Idempotencia.expira_em < datetime.now())
+                 .limit(IDEMPOTENCIA_LIMPEZA_LOTE))
+    return Idempotencia.delete().where(peewee.Tuple(Idempotencia.rota, Idempotencia.chave).in_(expiradas))
+
+
+def limpeza_pendente():
+    """True para no máximo uma chamada a cada IDEMPOTENCIA_LIMPEZA segundos por processo."""
+    global _proxima_limpeza
+    with _limpeza_lock:
+        agora = time.monotonic()
+        if agora < _proxima_limpeza:
+            return False
+        _proxima_limpeza = agora + IDEMPOTENCIA_LIMPEZA
+        return True
+
+
+def _reservar(rota, chave, hash_requisicao):
+    return next(iter(reserva(rota, chave, hash_requisicao).execute()), None) is not None
+
+
+def _aguardar(rota, chave, hash_requisicao):
+    """Espera a requisição original com a mesma chave terminar.
+
+    Devolve (hash_requisicao, status, corpo, cabecalhos) da resposta gravada, ou None se a chave
+    foi liberada e acabou reservada por esta requisição.
+    """
+    prazo = time.monotonic() + IDEMPOTENCIA_ESPERA
+    espera = 0.02
+    while True:
+        gravado = registro(rota, chave).first()
+        if gravado is None or gravado[3] < datetime.now():
+            # Chave liberada (a original falhou) ou expirada, inclusive uma reserva
+            # abandonada sem resposta: tentar reservar de novo
+            if gravado is not None:
+                liberacao(rota, chave, expirada=True).execute()
+            if _reservar(rota, chave, hash_requisicao):
+                return None
+            continue
+        resultado = avaliar(gravado, hash_requisicao, prazo)
+        if resultado is not None:
+            return resultado
+        time.sleep(espera)
+        espera = min(espera * 2, 0.5)
+
+
+def avaliar(gravado, hash_requisicao, prazo):
+    """Resposta para a repetição a partir do registro da chave, ou None se ainda deve esperar."""
+    hash_gravado, status_code, resposta, _, cabecalhos = gravado
+    if status_code is not None:
+        return hash_gravado, status_code, json.loads(resposta), json.loads(cabecalhos) if cabecalhos else {}
+    if hash_gravado != hash_requisicao:
+        return hash_gravado, None, None, {}
+    if time.monotonic() > prazo:
+        return hash_gravado, 409, {'error': 'Requisição com a mesma chave ainda em processamento'}, {}
+    return None
+
+
+def _liberar(rota, chave):
+    liberacao(rota, chave).execute()
+
+
+def _limpar():
+    # Apagar as chaves expiradas de tempos em tempos (a tabela não cresce sem limite)
+    if limpeza_pendente():
+        try:
+            limpeza().execute()
+        except Exception as e:
+            logger.error(f"Erro na limpeza de chaves de idempotência: {str(e)}")
+
+
+def idempotente(metodo):
+    """Garante que POSTs repetidos com o mesmo Idempotency-Key são processados uma só vez.
+
+    A primeira resposta (2xx ou 4xx), com os cabeçalhos definidos pelo resource, fica
+    gravada na tabela idempotencia e num cache LRU em memória; repetições recebem a
+    resposta gravada, e repetições concorrentes
+    esperam a original terminar.
+    """
+    @functools.wraps(metodo)
+    def wrapper(*args, **kwargs):
+        chave = request.headers.get(IDEMPOTENCIA_HEADER)
+        if not chave:
+            return metodo(*args, **kwargs)
+        if len(chave) > 255:
+            return {'error': f'{IDEMPOTENCIA_HEADER} excede o tamanho máximo de 255 caracteres'}, 400
+
+        rota = request.path
+        hash_requisicao = hashlib.sha256(request.get_data()).hexdigest()
+        cache_key = f'{rota}:{chave}'
+
+        gravada = _respostas.get(cache_key)
+        if gravada is None and not _reservar(rota, chave, hash_requisicao):
+            gravada = _aguardar(rota, chave, hash_requisicao)
+            if gravada is not None and gravada[1] not in (None, 409):
+                _respostas.set(cache_key, gravada, IDEMPOTENCIA_TTL)
+
+        if gravada is not None:
+            hash_gravado, status, corpo, cabecalhos = gravada
+            if hash_gravado != hash_requisicao:
+                return {'error': f'{IDEMPOTENCIA_HEADER} já usada com outro corpo de requisição'}, 422
+            return corpo, status, {**cabecalhos, 'Idempotent-Replayed': 'true'}
+
+        # Chave reservada por esta requisição: processar normalmente
+        try:
+            resultado = metodo(*args, **kwargs)
+        except Exception:
+            _liberar(rota, chave)
+            raise
+        corpo, status, *cabecalhos = resultado
+        cabecalhos = dict(cabecalhos[0]) if cabecalhos else {}
+
+        if status >= 500:
+            # Erros do servidor não são gravados, para que a repetição tente de novo
+            _liberar(rota, chave)
+        else:
+            gravacao(rota, chave, status, corpo, cabecalhos).execute()
+            _respostas.set(cache_key, (hash_requisicao, status, corpo, cabecalhos), IDEMPOTENCIA_TTL)
+        _limpar()
+        return resultado
+    return wrapper
@@ -1,88 +1,274 @@
+from flask import make_response
 from flask_restful import Resource, request
+from ..config.cache import snapshot_cache
 from ..config.database import db, logger
 from ..models.carteira import Carteira
-from ..models.movimentacoes import Movimentacoes
+from ..models.movimentacoes import Movimentacoes, positivo_em_centavos, quantizar
+from ..models.carteira_diaria import registrar_saldo_diario
+from ..models.fila_movimentacoes import FilaMovimentacoes
+from .carteira import evento_fundo
+from .idempotencia import idempotente
+from .serializacao import compilar_objeto, lista, linhas, texto
 from datetime import datetime
+from decimal import Decimal
+import base64
+import os
 import peewee
 
-class MovimentacoesResource(Resource):
-    def post(self):
+# Paginação do histórico
+LIMITE_PADRAO = 50
+LIMITE_MAXIMO = 500
+
+# Modo assíncrono: enfileira a operação e responde 202 (também por requisição, com Prefer: respond-async)
+MOVIMENTACOES_ASSINCRONO = os.environ.get('MOVIMENTACOES_ASSINCRONO', '0') == '1'
+# Máximo de operações pendentes na fila antes de recusar novas (503)
+FILA_MAX = int(os.environ.get('FILA_MAX', 100000))
+
+serializar_movimentacao = compilar_objeto([
+    ('id', 'int'),
+    ('carteira_id', 'int'),
+    ('fundo', 'texto'),
+    ('data_operacao', 'data'),
+    ('tipo', 'texto'),
+    ('valor', 'decimal'),
+    ('quantidade_cotas', 'decimal'),
+])
+
+RESPOSTA_GET = '{"movimentacoes":%s,"proximo_cursor":%s}'
+
+
+def _encode_cursor(data_operacao, id_):
+    raw = f"{data_operacao.strftime('%Y-%m-%d')}|{id_}"
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+
+def _decode_cursor(cursor):
+    data_operacao, id_ = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8').split('|')
+    return datetime.strptime(data_operacao, '%Y-%m-%d').date(), int(id_)
+
+
+def consulta_movimentacoes(args):
+    """Valida os parâmetros do GET /api/v1/movimentacoes e devolve (query, limite).
+
+    Parâmetros inválidos levantam ValueError com a mensagem para o cliente.
+    """
+    try:
+        limite = int(args.get('limit', LIMITE_PADRAO))
+    except ValueError:
+        raise ValueError('limit deve ser um inteiro')
+    if limite <= 0 or limite > LIMITE_MAXIMO:
+        raise ValueError(f'limit deve estar entre 1 e {LIMITE_MAXIMO}')
+    if 'tipo' in args and args['tipo'] not in ['APORTE', 'RESGATE']:
+        raise ValueError('tipo deve ser APORTE ou RESGATE')
+    try:
+        data_inicio = datetime.strptime(args['data_inicio'], '%Y-%m-%d').date() if 'data_inicio' in args else None
+        data_fim = datetime.strptime(args['data_fim'], '%Y-%m-%d').date() if 'data_fim' in args else None
+    except ValueError:
+        raise ValueError('datas devem estar no formato YYYY-MM-DD')
+    try:
+        cursor = _decode_cursor(args['cursor']) if 'cursor' in args else None
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError('cursor inválido')
+
+    # Montar consulta com paginação por chave (data_operacao DESC, id DESC)
+    query = (Movimentacoes
+             .select(Movimentacoes.id, Movimentacoes.carteira, Carteira.nome, Movimentacoes.data_operacao,
+                     Movimentacoes.tipo, Movimentacoes.valor, Movimentacoes.quantidade_cotas)
+             .join(Carteira)
+             .order_by(Movimentacoes.data_operacao.desc(), Movimentacoes.id.desc())
+             .limit(limite + 1))
+    if 'carteira_id' in args:
         try:
-            # Obter os dados do JSON
-            data = request.get_json()
-            if not data:
-                return {'error': 'Nenhum dado fornecido'}, 400
+            query = query.where(Movimentacoes.carteira == int(args['carteira_id']))
+        except ValueError:
+            raise ValueError('carteira_id deve ser um inteiro')
+    if 'tipo' in args:
+        query = query.where(Movimentacoes.tipo == args['tipo'])
+    if data_inicio:
+        query = query.where(Movimentacoes.data_operacao >= data_inicio)
+    if data_fim:
+        query = query.where(Movimentacoes.data_operacao <= data_fim)
+    if cursor:
+        # O filtro redundante em data_operacao deixa o planner descartar as partições mais novas
+        query = query.where(Movimentacoes.data_operacao <= cursor[0],
+                            peewee.Tuple(Movimentacoes.data_operacao, Movimentacoes.id) < peewee.Tuple(*cursor))
+    return query, limite
+
+
+def pagina_movimentacoes(rows, limite):
+    # Corpo JSON da página; a linha a mais (limite + 1) indica que há próxima página
+    proximo_cursor = None
+    if len(rows) > limite:
+        rows = rows[:limite]
+        proximo_cursor = _encode_cursor(rows[-1][3], rows[-1][0])
+    return RESPOSTA_GET % (lista(serializar_movimentacao, rows), texto(proximo_cursor))
+
+
+def validar_movimentacao(data):
+    """Mensagem de erro do corpo do POST /api/v1/movimentacoes, ou None se for válido."""
+    if not data:
+        return 'Nenhum dado fornecido'
+
+    # Validar campos obrigatórios
+    required_fields = ['carteira_id', 'tipo', 'quantidade', 'valor']
+    for field in required_fields:
+        if field not in data:
+            return f'Campo {field} é obrigatório'
+
+    # Validar valores
+    if not positivo_em_centavos(data['quantidade']):
+        return 'quantidade deve ser um número positivo (mínimo 0.01)'
+    if not positivo_em_centavos(data['valor']):
+        return 'valor deve ser um número positivo (mínimo 0.01)'
+    if data['tipo'] not in ['APORTE', 'RESGATE']:
+        return 'tipo deve ser APORTE ou RESGATE'
+    return None
+
+
+def atualizacao_saldo(carteira_id, tipo, quantidade, valor, now):
+    """UPDATE condicional do saldo da carteira, devolvendo (id, quantidade_cotas, valor_investido).
 
-            # Validar campos obrigatórios
-            required_fields = ['carteira_id', 'tipo', 'quantidade', 'valor']
-            for field in required_fields:
-                if field not in data:
-                    return {'error': f'Campo {field} é obrigatório'}, 400
+    Não devolve linha se a carteira não existe ou se o resgate excede o saldo de cotas.
+    """
+    # O valor proporcional do resgate usa os saldos anteriores da própria linha
+    if tipo == 'APORTE':
+        update = Carteira.update(
+            quantidade_cotas=Carteira.quantidade_cotas + quantidade,
+            valor_investido=Carteira.valor_investido + valor,
+            atualizado_em=now
+        ).where(Carteira.id == carteira_id)
+    else:  # RESGATE
+        update = Carteira.update(
+            quantidade_cotas=Carteira.quantidade_cotas - quantidade,
+            valor_investido=Carteira.valor_investido - (quantidade / Carteira.quantidade_cotas) * Carteira.valor_investido,
+            atualizado_em=now
+        ).where((Carteira.id == carteira_id) & (Carteira.quantidade_cotas >= quantidade))
+    return update.returning(Carteira.id, Carteira.quantidade_cotas, Carteira.valor_investido).tuples()
 
-            # Verificar se a carteira existe
+
+def resposta_movimentacao(id_, carteira_id, hoje, tipo, valor, quantidade, quantidade_cotas, valor_investido):
+    # Corpo da resposta do POST /api/v1/movimentacoes
+    return {
+        'id': id_,
+        'carteira_id': carteira_id,
+        'data_operacao': hoje.strftime('%Y-%m-%d'),
+        'tipo': tipo,
+        'valor': float(valor),
+        'quantidade_cotas': float(quantidade),
+        'saldo_atual': {
+            'quantidade_cotas': float(quantidade_cotas),
+            'valor_investido': float(valor_investido)
+        }
+    }
+
+
+class MovimentacoesResource(Resource):
+    method_decorators = {'post': [idempotente]}
+
+    def get(self):
+        try:
             try:
-                carteira = Carteira.get(Carteira.id == data['carteira_id'])
-            except peewee.DoesNotExist:
-                return {'error': 'Carteira não encontrada'}, 404
-
-            # Validar valores
-            if not isinstance(data['quantidade'], (int, float)) or data['quantidade'] <= 0:
-                return {'error': 'quantidade deve ser um número positivo'}, 400
-            if not isinstance(data['valor'], (int, float)) or data['valor'] <= 0:
-                return {'error': 'valor deve ser um número positivo'}, 400
-            if data['tipo'] not in ['APORTE', 'RESGATE']:
-                return {'error': 'tipo deve ser APORTE ou RESGATE'}, 400
-
-            # Se for resgate, verificar se há saldo suficiente
-            if data['tipo'] == 'RESGATE' and data['quantidade'] > carteira.quantidade_cotas:
-                return {'error': 'Quantidade de cotas insuficiente para resgate'}, 400
+                query, limite = consulta_movimentacoes(request.args)
+            except ValueError as e:
+                return {'error': str(e)}, 400
+
+            # Montar resposta
+            response = make_response(pagina_movimentacoes(linhas(db, query), limite), 200)
+            response.mimetype = 'application/json'
+            return response
+
+        except Exception as e:
+            logger.error(f"Erro no GET /api/v1/movimentacoes: {str(e)}")
+            return {'error': str(e)}, 500
+
+    def post(self):
+        try:
+            # Obter e validar os dados do JSON
+            data = request.get_json()
+            erro = validar_movimentacao(data)
+            if erro:
+                return {'error': erro}, 400
 
             now = datetime.now()
             hoje = datetime.now().date()
+            quantidade = quantizar(Decimal(str(data['quantidade'])))
+            valor = quantizar(Decimal(str(data['valor'])))
+
+            if MOVIMENTACOES_ASSINCRONO or 'respond-async' in request.headers.get('Prefer', ''):
+                return self._enfileirar(data, quantidade, valor, now)
 
             with db.atomic():
+                # Atualizar o saldo da carteira num único UPDATE condicional
+                saldo = atualizacao_saldo(data['carteira_id'], data['tipo'], quantidade, valor, now).execute()
+                saldo = next(iter(saldo), None)
+                if saldo is None:
+                    # Nenhuma linha atualizada: carteira inexistente ou saldo insuficiente
+                    if not Carteira.select().where(Carteira.id == data['carteira_id']).exists():
+                        return {'error': 'Carteira não encontrada'}, 404
+                    return {'error': 'Quantidade de cotas insuficiente para resgate'}, 400
+                carteira_id, quantidade_cotas, valor_investido = saldo
+
                 # Registrar a movimentação
                 logger.info(f"Inserindo movimentação: carteira_id={data['carteira_id']}, tipo={data['tipo']}, valor={data['valor']}, quantidade={data['quantidade']}, data_op={hoje}, criado_em={now}")
-                
+
                 movimentacao = Movimentacoes.create(
-                    carteira=carteira,
+                    carteira=carteira_id,
                     data_operacao=hoje,
                     tipo=data['tipo'],
-                    valor=data['valor'],
-                    quantidade_cotas=data['quantidade'],
+                    valor=valor,
+                    quantidade_cotas=quantidade,
+                    saldo_cotas=quantidade_cotas,
+                    saldo_investido=valor_investido,
                     criado_em=now
                 )
 
-                # Atualizar o saldo da carteira
-                if data['tipo'] == 'APORTE':
-                    carteira.quantidade_cotas += data['quantidade']
-                    carteira.valor_investido += data['valor']
-                else:  # RESGATE
-                    carteira.quantidade_cotas -= data['quantidade']
-                    # Calcular o valor proporcional do resgate
-                    valor_proporcional = (data['quantidade'] / (carteira.quantidade_cotas + data['quantidade'])) * carteira.valor_investido
-                    carteira.valor_investido -= valor_proporcional
+                # Atualizar o saldo do dia na série histórica
+                registrar_saldo_diario([(carteira_id, quantidade_cotas, valor_investido)], hoje, now)
 
-                carteira.atualizado_em = now
-                carteira.save()
+                # Publicar o novo saldo e a movimentação para o stream de eventos (entregue no commit)
+                evento_fundo(carteira_id, now, (movimentacao.id, hoje, movimentacao.tipo,
+                                                quantizar(quantidade), quantizar(valor)))
+
+            # Invalidar o snapshot do GET /api/v1/carteira
+            snapshot_cache.invalidate()
 
             # Montar resposta
-            response = {
-                'id': movimentacao.id,
-                'carteira_id': carteira.id,
-                'data_operacao': hoje.strftime('%Y-%m-%d'),
-                'tipo': movimentacao.tipo,
-                'valor': float(movimentacao.valor),
-                'quantidade_cotas': float(movimentacao.quantidade_cotas),
-                'saldo_atual': {
-                    'quantidade_cotas': float(carteira.quantidade_cotas),
-                    'valor_investido': float(carteira.valor_investido)
-                }
-            }
+            response = resposta_movimentacao(movimentacao.id, carteira_id, hoje, movimentacao.tipo, movimentacao.valor,
+                                             movimentacao.quantidade_cotas, quantidade_cotas, valor_investido)
 
             logger.info(f"Movimentação registrada: {response}")
             return response, 201
 
         except Exception as e:
             logger.error(f"Erro no POST /api/v1/movimentacoes: {str(e)}")
-            return {'error': str(e)}, 500
\ No newline at end of file
+            return {'error': str(e)}, 500
+
+    def _enfileirar(self, data, quantidade, valor, now):
+        # Backpressure: recusar quando a fila já tem FILA_MAX operações pendentes
+        pendentes = (FilaMovimentacoes
+                     .select(FilaMovimentacoes.id)
+                     .where(FilaMovimentacoes.status == 'PENDENTE')
+                     .limit(FILA_MAX)
+                     .count())
+        if pendentes >= FILA_MAX:
+            return {'error': 'Fila de movimentações cheia, tente novamente'}, 503, {'Retry-After': '5'}
+
+        try:
+            operacao = FilaMovimentacoes.create(
+                carteira=data['carteira_id'],
+                tipo=data['tipo'],
+                valor=valor,
+                quantidade_cotas=quantidade,
+                criado_em=now
+            )
+        except peewee.IntegrityError:
+            return {'error': 'Carteira não encontrada'}, 404
+
+        status_url = f'/api/v1/movimentacoes/operacoes/{operacao.id}'
+        response = {
+            'operacao_id': operacao.id,
+            'status': operacao.status,
+            'status_url': status_url
+        }
+        logger.info(f"Movimentação enfileirada: {response}")
+        return response, 202, {'Location': status_url}
@@ -0,0 +1,92 @@
+from flask_restful import Resource, request
+from ..config.cache import snapshot_cache
+from ..config.database import db, logger
+from ..models.eventos import emitir_recarregar
+from ..models.movimentacoes import positivo_em_centavos, quantizar
+from ..models.operacoes import registrar_operacoes
+from datetime import datetime
+from decimal import Decimal
+import os
+
+# Tamanho máximo de um lote
+LOTE_MAX = int(os.environ.get('MOVIMENTACOES_LOTE_MAX', 10000))
+
+
+def _validar_item(item):
+    if not isinstance(item, dict):
+        return 'Operação deve ser um objeto'
+    for field in ['carteira_id', 'tipo', 'quantidade', 'valor']:
+        if field not in item:
+            return f'Campo {field} é obrigatório'
+    if not isinstance(item['carteira_id'], int) or isinstance(item['carteira_id'], bool):
+        return 'carteira_id deve ser um inteiro'
+    if not positivo_em_centavos(item['quantidade']):
+        return 'quantidade deve ser um número positivo (mínimo 0.01)'
+    if not positivo_em_centavos(item['valor']):
+        return 'valor deve ser um número positivo (mínimo 0.01)'
+    if item['tipo'] not in ['APORTE', 'RESGATE']:
+        return 'tipo deve ser APORTE ou RESGATE'
+    return None
+
+
+class MovimentacoesLoteResource(Resource):
+    def post(self):
+        try:
+            # Obter a lista de operações
+            data = request.get_json()
+            if not data or not isinstance(data, list):
+                return {'error': 'Envie uma lista de operações'}, 400
+            if len(data) > LOTE_MAX:
+                return {'error': f'Lote excede o máximo de {LOTE_MAX} operações'}, 400
+
+            # Validar todas as operações antes de tocar no banco
+            erros = {i: erro for i, erro in enumerate(map(_validar_item, data)) if erro}
+            if erros:
+                return self._lote_invalido(data, erros)
+
+            now = datetime.now()
+
+            with db.atomic():
+                logger.info(f"Inserindo lote de {len(data)} movimentações")
+                ids, erros, saldos = registrar_operacoes(data, now)
+                if erros:
+                    return self._lote_invalido(data, erros)
+                emitir_recarregar(now)
+
+            # Invalidar o snapshot do GET /api/v1/carteira
+            snapshot_cache.invalidate()
+
+            # Montar resposta
+            response = {
+                'resultados': [{
+                    'indice': i,
+                    'status': 'ok',
+                    'id': ids[i],
+                    'carteira_id': item['carteira_id'],
+                    'data_operacao': now.strftime('%Y-%m-%d'),
+                    'tipo': item['tipo'],
+                    'valor': float(quantizar(Decimal(str(item['valor'])))),
+                    'quantidade_cotas': float(quantizar(Decimal(str(item['quantidade']))))
+                } for i, item in enumerate(data)],
+                'saldos': [{
+                    'carteira_id': cid,
+                    'quantidade_cotas': float(quantidade_cotas),
+                    'valor_investido': float(valor_investido)
+                } for cid, (quantidade_cotas, valor_investido) in saldos.items()]
+            }
+
+            logger.info(f"Lote de {len(ids)} movimentações registrado")
+            return response, 201
+
+        except Exception as e:
+            logger.error(f"Erro no POST /api/v1/movimentacoes/lote: {str(e)}")
+            return {'error': str(e)}, 500
+
+    def _lote_invalido(self, data, erros):
+        return {
+            'error': 'Lote inválido, nenhuma operação foi registrada',
+            'resultados': [
+                {'indice': i, 'status': 'erro', 'error': erros[i]} if i in erros else {'indice': i, 'status': 'ok'}
+                for i in range(len(data))
+            ]
+        }, 400
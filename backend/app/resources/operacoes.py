@@ -0,0 +1,30 @@
+from flask_restful import Resource
+from ..config.database import logger
+from ..models.fila_movimentacoes import FilaMovimentacoes
+import peewee
+
+class OperacaoResource(Resource):
+    def get(self, operacao_id):
+        try:
+            try:
+                operacao = FilaMovimentacoes.get(FilaMovimentacoes.id == operacao_id)
+            except peewee.DoesNotExist:
+                return {'error': 'Operação não encontrada'}, 404
+
+            response = {
+                'operacao_id': operacao.id,
+                'carteira_id': operacao.carteira_id,
+                'tipo': operacao.tipo,
+                'valor': float(operacao.valor),
+                'quantidade_cotas': float(operacao.quantidade_cotas),
+                'status': operacao.status,
+                'erro': operacao.erro,
+                'movimentacao_id': operacao.movimentacao_id,
+                'criado_em': operacao.criado_em.strftime('%Y-%m-%d %H:%M:%S'),
+                'processado_em': operacao.processado_em.strftime('%Y-%m-%d %H:%M:%S') if operacao.processado_em else None
+            }
+            return response, 200
+
+        except Exception as e:
+            logger.error(f"Erro no GET /api/v1/movimentacoes/operacoes/{operacao_id}: {str(e)}")
+            return {'error': str(e)}, 500
@@ -0,0 +1,12 @@
+from flask_restful import Resource
+from ..config.database import db, logger
+
+class PoolResource(Resource):
+    def get(self):
+        try:
+            stats = db.pool_stats()
+            stats['replicas'] = db.replicas_stats()
+            return stats, 200
+        except Exception as e:
+            logger.error(f"Erro no GET /api/v1/pool: {str(e)}")
+            return {'error': str(e)}, 500
@@ -0,0 +1,32 @@
+from flask import make_response
+from flask_restful import Resource, request
+from ..config.cache import snapshot_cache
+from ..config.database import db, logger
+from ..models.rentabilidade import calcular_rentabilidade
+from datetime import date
+
+
+def _build_rentabilidade():
+    fundos, carteira = calcular_rentabilidade()
+    return {'asOf': date.today().strftime('%Y-%m-%d'), 'portfolio': carteira, 'funds': fundos}
+
+
+class RentabilidadeResource(Resource):
+    def get(self):
+        try:
+            # Resultado em cache, invalidado pelas mesmas escritas que o snapshot da carteira
+            with db.primario():
+                snapshot = snapshot_cache.get_or_build('rentabilidade', _build_rentabilidade)
+
+            if request.if_none_match.contains(snapshot['etag']):
+                response = make_response('', 304)
+            else:
+                response = make_response(snapshot['body'], 200)
+                response.mimetype = 'application/json'
+            response.set_etag(snapshot['etag'])
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+
+        except Exception as e:
+            logger.error(f"Erro no GET /api/v1/carteira/rentabilidade: {str(e)}")
+            return {'error': str(e)}, 500
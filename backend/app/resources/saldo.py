@@ -0,0 +1,41 @@
+from flask_restful import Resource, request
+from ..config.database import logger
+from ..models.carteira import Carteira
+from ..models.movimentacoes import Movimentacoes
+from datetime import datetime
+
+
+class SaldoResource(Resource):
+    def get(self, carteira_id):
+        try:
+            # Validar parâmetros
+            try:
+                data = datetime.strptime(request.args['data'], '%Y-%m-%d').date() if 'data' in request.args else datetime.now().date()
+            except ValueError:
+                return {'error': 'data deve estar no formato YYYY-MM-DD'}, 400
+
+            if not Carteira.select().where(Carteira.id == carteira_id).exists():
+                return {'error': 'Carteira não encontrada'}, 404
+
+            # Saldo gravado na última movimentação até a data, pelo índice (carteira_id, data_operacao DESC, id DESC)
+            ultima = (Movimentacoes
+                      .select(Movimentacoes.id, Movimentacoes.data_operacao,
+                              Movimentacoes.saldo_cotas, Movimentacoes.saldo_investido)
+                      .where((Movimentacoes.carteira == carteira_id) & (Movimentacoes.data_operacao <= data))
+                      .order_by(Movimentacoes.data_operacao.desc(), Movimentacoes.id.desc())
+                      .tuples()
+                      .first())
+            movimentacao_id, data_operacao, quantidade_cotas, valor_investido = ultima or (None, None, 0, 0)
+
+            return {
+                'carteira_id': carteira_id,
+                'date': data.strftime('%Y-%m-%d'),
+                'quantity': float(quantidade_cotas),
+                'amount': float(valor_investido),
+                'lastTransaction': movimentacao_id,
+                'lastTransactionDate': data_operacao.strftime('%Y-%m-%d') if data_operacao else None
+            }, 200
+
+        except Exception as e:
+            logger.error(f"Erro no GET /api/v1/carteira/{carteira_id}/saldo: {str(e)}")
+            return {'error': str(e)}, 500
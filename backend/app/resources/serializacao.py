@@ -0,0 +1,62 @@
+"""Serialização direta de linhas (tuplas do driver) para JSON.
+
+Cada objeto é descrito uma vez por (chave, tipo); daí sai um template de
+formatação e a lista de conversores por coluna, aplicados a tuplas cruas do
+cursor, sem instanciar modelos do peewee nem dicts intermediários. Decimais
+são escritos com o texto do próprio Decimal, sem passar por float.
+"""
+from decimal import Decimal
+from json.encoder import encode_basestring_ascii as _texto
+
+CENTAVOS = Decimal('0.01')
+
+
+def _data(valor):
+    # date ou datetime -> "YYYY-MM-DD"
+    return '"' + valor.isoformat()[:10] + '"'
+
+
+def numero(valor):
+    if valor.__class__ is not Decimal:
+        # Agregados no perfil local (SQLite) voltam como int/float: em centavos, como o DECIMAL(10,2)
+        valor = Decimal(repr(valor)).quantize(CENTAVOS)
+    return format(valor, 'f')
+
+
+def _nulo(conversor):
+    return lambda valor: 'null' if valor is None else conversor(valor)
+
+
+CONVERSORES = {
+    'int': str,
+    'texto': _texto,
+    'data': _data,
+    'decimal': numero,
+}
+
+
+def compilar_objeto(campos, nulos=()):
+    """Devolve uma função que serializa uma tupla no objeto JSON descrito por campos.
+
+    campos: sequência de (chave, tipo), na mesma ordem das colunas da tupla.
+    nulos: chaves que podem vir como None.
+    """
+    template = '{' + ','.join(_texto(chave).replace('%', '%%') + ':%s' for chave, _ in campos) + '}'
+    conversores = tuple(_nulo(CONVERSORES[tipo]) if chave in nulos else CONVERSORES[tipo] for chave, tipo in campos)
+
+    def serializar(row):
+        return template % tuple([conversor(valor) for conversor, valor in zip(conversores, row)])
+    return serializar
+
+
+def lista(serializar, rows):
+    return '[' + ','.join(map(serializar, rows)) + ']'
+
+
+def texto(valor):
+    return 'null' if valor is None else _texto(valor)
+
+
+def linhas(db, query):
+    """Executa a query do peewee e devolve as tuplas cruas do driver."""
+    return db.execute(query).fetchall()
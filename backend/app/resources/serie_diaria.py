@@ -0,0 +1,55 @@
+from flask_restful import Resource, request
+from ..config.database import logger
+from ..models.carteira import Carteira
+from ..models.carteira_diaria import CarteiraDiaria
+from datetime import datetime, timedelta
+
+# Período padrão quando data_inicio não é informada
+PERIODO_PADRAO_DIAS = 90
+
+
+class SerieDiariaResource(Resource):
+    def get(self, carteira_id):
+        try:
+            args = request.args
+
+            # Validar parâmetros
+            try:
+                data_fim = datetime.strptime(args['data_fim'], '%Y-%m-%d').date() if 'data_fim' in args else datetime.now().date()
+                data_inicio = (datetime.strptime(args['data_inicio'], '%Y-%m-%d').date() if 'data_inicio' in args
+                               else data_fim - timedelta(days=PERIODO_PADRAO_DIAS))
+            except ValueError:
+                return {'error': 'datas devem estar no formato YYYY-MM-DD'}, 400
+            if data_inicio > data_fim:
+                return {'error': 'data_inicio deve ser anterior a data_fim'}, 400
+
+            if not Carteira.select().where(Carteira.id == carteira_id).exists():
+                return {'error': 'Carteira não encontrada'}, 404
+
+            # Saldo vigente no início do período + dias com movimentação no período,
+            # ambos lidos pela chave primária (carteira_id, data)
+            colunas = (CarteiraDiaria.data, CarteiraDiaria.quantidade_cotas, CarteiraDiaria.valor_investido)
+            anterior = (CarteiraDiaria
+                        .select(*colunas)
+                        .where((CarteiraDiaria.carteira == carteira_id) & (CarteiraDiaria.data < data_inicio))
+                        .order_by(CarteiraDiaria.data.desc())
+                        .limit(1))
+            periodo = (CarteiraDiaria
+                       .select(*colunas)
+                       .where((CarteiraDiaria.carteira == carteira_id) &
+                              (CarteiraDiaria.data.between(data_inicio, data_fim))))
+            query = (anterior | periodo).order_by(CarteiraDiaria.data).tuples()
+
+            serie = []
+            for data, quantidade_cotas, valor_investido in query:
+                serie.append({
+                    'date': max(data, data_inicio).strftime('%Y-%m-%d'),
+                    'quantity': float(quantidade_cotas),
+                    'amount': float(valor_investido)
+                })
+
+            return {'carteira_id': carteira_id, 'serie': serie}, 200
+
+        except Exception as e:
+            logger.error(f"Erro no GET /api/v1/carteira/{carteira_id}/serie: {str(e)}")
+            return {'error': str(e)}, 500
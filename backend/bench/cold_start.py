@@ -0,0 +1,79 @@
+"""Tempo de partida a frio do app, cada amostra num processo Python novo.
+
+Mede o import + create_app() e a primeira requisição de cada rota (POST carteira,
+POST movimentação, GET carteira) no perfil local, com banco em memória:
+
+    python -m bench.cold_start --repeticoes 10 --output partida.json
+
+Não precisa de Postgres nem da API rodando. A saída é JSON (mediana e máximo em ms).
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+from datetime import datetime
+
+AMOSTRA = r'''
+import json, time
+inicio = time.perf_counter()
+from app import create_app
+app = create_app({'DB_PERFIL': 'local', 'DB_LOCAL_PATH': ':memory:'})
+tempos = {'create_app': time.perf_counter() - inicio}
+cliente = app.test_client()
+
+def medir(nome, metodo, url, **kwargs):
+    t = time.perf_counter()
+    resposta = getattr(cliente, metodo)(url, **kwargs)
+    tempos[nome] = time.perf_counter() - t
+    assert resposta.status_code < 300, (nome, resposta.status_code, resposta.get_data(as_text=True))
+    return resposta.get_json()
+
+fundo = medir('carteira_post', 'post', '/api/v1/carteira',
+              json={'name': 'Fundo Bench', 'ticker': 'BNCH11', 'type': 'FII', 'quoteValue': 10.0})
+medir('movimentacoes_post', 'post', '/api/v1/movimentacoes',
+      json={'carteira_id': fundo['id'], 'tipo': 'APORTE', 'valor': 100.0, 'quantidade': 10})
+medir('carteira_get', 'get', '/api/v1/carteira')
+tempos['total'] = time.perf_counter() - inicio
+print(json.dumps(tempos))
+'''
+
+
+def amostra():
+    # Processo novo a cada amostra: nada importado nem em cache
+    raiz = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    saida = subprocess.run([sys.executable, '-c', AMOSTRA], cwd=raiz, capture_output=True, text=True, check=True)
+    return json.loads(saida.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeticoes', type=int, default=10)
+    parser.add_argument('--output')
+    args = parser.parse_args()
+
+    amostras = [amostra() for _ in range(args.repeticoes)]
+    resultado = {
+        'data': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'repeticoes': args.repeticoes,
+        'etapas': {
+            etapa: {
+                'mediana_ms': round(statistics.median(a[etapa] for a in amostras) * 1000, 1),
+                'max_ms': round(max(a[etapa] for a in amostras) * 1000, 1)
+            }
+            for etapa in amostras[0]
+        }
+    }
+
+    texto = json.dumps(resultado, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(texto)
+    print(texto)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+"""Compara dois resultados de bench.run e aponta regressões.
+
+    python -m bench.compare base.json novo.json --tolerancia 10
+
+Sai com código 1 se algum cenário piorar mais que a tolerância (%) em rps ou p95.
+"""
+import argparse
+import json
+import sys
+
+
+def _indexar(arquivo):
+    with open(arquivo, encoding='utf-8') as f:
+        dados = json.load(f)
+    return dados, {(r['cenario'], r['concorrencia']): r for r in dados['resultados']}
+
+
+def _variacao(base, novo):
+    if not base or novo is None:
+        return None
+    return (novo - base) / base * 100
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('base')
+    parser.add_argument('novo')
+    parser.add_argument('--tolerancia', type=float, default=10, help='piora máxima aceita, em %%')
+    args = parser.parse_args()
+
+    base, base_idx = _indexar(args.base)
+    novo, novo_idx = _indexar(args.novo)
+    print(f"base {base.get('commit')}  ->  novo {novo.get('commit')}")
+    print(f"{'cenário':<22}{'conc':>5}{'rps':>12}{'Δ%':>8}{'p95 ms':>12}{'Δ%':>8}{'p99 ms':>12}{'Δ%':>8}")
+
+    regressoes = []
+    for chave in sorted(base_idx.keys() & novo_idx.keys()):
+        b, n = base_idx[chave], novo_idx[chave]
+        d_rps = _variacao(b['rps'], n['rps'])
+        d_p95 = _variacao(b['p95_ms'], n['p95_ms'])
+        d_p99 = _variacao(b['p99_ms'], n['p99_ms'])
+        print(f"{chave[0]:<22}{chave[1]:>5}{n['rps']:>12}{d_rps or 0:>8.1f}"
+              f"{n['p95_ms'] or 0:>12}{d_p95 or 0:>8.1f}{n['p99_ms'] or 0:>12}{d_p99 or 0:>8.1f}")
+        if (d_rps is not None and d_rps < -args.tolerancia) or (d_p95 is not None and d_p95 > args.tolerancia):
+            regressoes.append(chave)
+
+    if regressoes:
+        print('REGRESSÃO: ' + ', '.join(f'{c}@{n}' for c, n in regressoes))
+        sys.exit(1)
+    print('Sem regressões acima da tolerância')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,170 @@
+"""Carga na API com concorrência fixa, medindo vazão e latência (p50/p95/p99).
+
+Com a API rodando sobre um banco populado por bench.seed:
+
+    python -m bench.run --url http://localhost:5000 --concurrency 1,8,32 --duration 15 --output resultado.json
+
+A saída é JSON, comparável entre commits com bench.compare.
+"""
+import argparse
+import http.client
+import json
+import platform
+import random
+import subprocess
+import threading
+import time
+import urllib.parse
+from datetime import datetime
+
+
+def percentil(valores, p):
+    # Percentil pelo método nearest-rank
+    if not valores:
+        return None
+    ordenados = sorted(valores)
+    indice = max(0, min(len(ordenados) - 1, int(round(p / 100 * len(ordenados) + 0.5)) - 1))
+    return ordenados[indice]
+
+
+class Cliente:
+    """Conexão HTTP persistente, uma por thread."""
+
+    def __init__(self, url):
+        partes = urllib.parse.urlsplit(url)
+        self.prefixo = partes.path.rstrip('/')
+        self.conn = http.client.HTTPConnection(partes.hostname, partes.port or 80, timeout=30)
+
+    def request(self, method, path, body=None):
+        dados = json.dumps(body) if body is not None else None
+        self.conn.request(method, self.prefixo + path, body=dados, headers={'Content-Type': 'application/json'})
+        resposta = self.conn.getresponse()
+        return resposta.status, resposta.read()
+
+
+def _get_carteira(cliente, rng, fundos):
+    return cliente.request('GET', '/api/v1/carteira')[0] == 200
+
+
+def _post_movimentacao(cliente, rng, fundos):
+    body = {'carteira_id': rng.choice(fundos), 'tipo': 'APORTE',
+            'quantidade': rng.randint(1, 10), 'valor': round(rng.uniform(1, 100), 2)}
+    return cliente.request('POST', '/api/v1/movimentacoes', body)[0] == 201
+
+
+def _get_movimentacoes(cliente, rng, fundos):
+    return cliente.request('GET', f'/api/v1/movimentacoes?carteira_id={rng.choice(fundos)}&limit=50')[0] == 200
+
+
+def _misto(cliente, rng, fundos):
+    # 90% leituras, 10% escritas
+    if rng.random() < 0.9:
+        return _get_carteira(cliente, rng, fundos)
+    return _post_movimentacao(cliente, rng, fundos)
+
+
+CENARIOS = {
+    'carteira_get': _get_carteira,
+    'movimentacoes_post': _post_movimentacao,
+    'movimentacoes_get': _get_movimentacoes,
+    'misto': _misto,
+}
+
+
+def executar(url, cenario, concorrencia, duracao, fundos, seed):
+    latencias, erros = [], 0
+    lock = threading.Lock()
+    fim = time.perf_counter() + duracao
+
+    def worker(n):
+        nonlocal erros
+        cliente = Cliente(url)
+        rng = random.Random(seed + n)
+        locais, falhas = [], 0
+        while time.perf_counter() < fim:
+            inicio = time.perf_counter()
+            try:
+                ok = CENARIOS[cenario](cliente, rng, fundos)
+            except (OSError, http.client.HTTPException):
+                cliente = Cliente(url)
+                ok = False
+            locais.append(time.perf_counter() - inicio)
+            falhas += not ok
+        with lock:
+            latencias.extend(locais)
+            erros += falhas
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(concorrencia)]
+    inicio = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    decorrido = time.perf_counter() - inicio
+
+    return {
+        'cenario': cenario,
+        'concorrencia': concorrencia,
+        'requisicoes': len(latencias),
+        'erros': erros,
+        'duracao_s': round(decorrido, 3),
+        'rps': round(len(latencias) / decorrido, 1),
+        'p50_ms': round(percentil(latencias, 50) * 1000, 3) if latencias else None,
+        'p95_ms': round(percentil(latencias, 95) * 1000, 3) if latencias else None,
+        'p99_ms': round(percentil(latencias, 99) * 1000, 3) if latencias else None,
+    }
+
+
+def _commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='http://localhost:5000')
+    parser.add_argument('--cenarios', default=','.join(CENARIOS))
+    parser.add_argument('--concurrency', default='1,8,32')
+    parser.add_argument('--duration', type=float, default=10, help='segundos por cenário e nível de concorrência')
+    parser.add_argument('--warmup', type=float, default=2)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='arquivo JSON de saída (padrão: stdout)')
+    args = parser.parse_args()
+
+    cenarios = args.cenarios.split(',')
+    niveis = [int(n) for n in args.concurrency.split(',')]
+
+    # Fundos existentes para as escritas
+    _, corpo = Cliente(args.url).request('GET', '/api/v1/carteira')
+    fundos = [f['id'] for f in json.loads(corpo)['portfolio']] or [1]
+
+    resultados = []
+    for cenario in cenarios:
+        for concorrencia in niveis:
+            if args.warmup:
+                executar(args.url, cenario, concorrencia, args.warmup, fundos, args.seed)
+            resultado = executar(args.url, cenario, concorrencia, args.duration, fundos, args.seed)
+            print(json.dumps(resultado))
+            resultados.append(resultado)
+
+    saida = {
+        'commit': _commit(),
+        'data': datetime.now().isoformat(timespec='seconds'),
+        'maquina': platform.node(),
+        'python': platform.python_version(),
+        'url': args.url,
+        'fundos': len(fundos),
+        'duracao_s': args.duration,
+        'resultados': resultados,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(saida, f, indent=2)
+    else:
+        print(json.dumps(saida, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""Micro-benchmark da serialização do GET /api/v1/carteira.
+
+Compara o caminho antigo (modelos do peewee + dicts + float + json.dumps) com o
+caminho atual (tuplas do driver + conversores por coluna + template JSON),
+sobre os dados do banco configurado em app.config.database.
+
+    python -m bench.serializacao --database bench --repeticoes 20
+"""
+import argparse
+import json
+import statistics
+import time
+from decimal import Decimal, ROUND_HALF_UP
+import peewee
+from app.config.database import db
+from app.models.carteira import Carteira
+from app.models.movimentacoes import Movimentacoes
+from app.resources.carteira import CarteiraResource
+
+
+def caminho_antigo():
+    saldo_total = Carteira.select(peewee.fn.SUM(Carteira.valor_investido).alias('saldo_total')).scalar() or 0
+    valor_mercado_total = 0
+    fundos = []
+    for fundo in Carteira.select().order_by(Carteira.nome):
+        # Valor de mercado calculado em Python, arredondado como o ROUND(..., 2) do banco
+        valor_mercado = (Decimal(fundo.quantidade_cotas) * Decimal(fundo.valor_cota)).quantize(Decimal('0.01'), ROUND_HALF_UP)
+        valor_mercado_total += valor_mercado
+        fundos.append({
+            'id': fundo.id,
+            'date': fundo.atualizado_em.strftime('%Y-%m-%d') if hasattr(fundo.atualizado_em, 'strftime') else str(fundo.atualizado_em),
+            'fundName': fundo.nome,
+            'type': fundo.tipo,
+            'quantity': float(fundo.quantidade_cotas),
+            'amount': float(fundo.valor_investido),
+            'marketValue': float(valor_mercado),
+            'unrealizedPnl': float(valor_mercado - Decimal(fundo.valor_investido))
+        })
+    movimentacoes = []
+    query = (Movimentacoes
+             .select(Movimentacoes, Carteira)
+             .join(Carteira)
+             .order_by(Movimentacoes.data_operacao.desc(), Movimentacoes.id.desc())
+             .limit(5))
+    for mov in query:
+        movimentacoes.append({
+            'id': mov.id,
+            'date': mov.data_operacao.strftime('%Y-%m-%d') if hasattr(mov.data_operacao, 'strftime') else str(mov.data_operacao),
+            'fundName': mov.carteira.nome,
+            'type': mov.tipo,
+            'quantity': float(mov.quantidade_cotas),
+            'amount': float(mov.valor)
+        })
+    return json.dumps({
+        'portfolioSummary': {
+            'invested': float(saldo_total),
+            'marketValue': float(valor_mercado_total),
+            'unrealizedPnl': float(valor_mercado_total - Decimal(saldo_total))
+        },
+        'portfolio': fundos,
+        'recentTransactions': movimentacoes
+    })
+
+
+def caminho_atual():
+    return CarteiraResource()._build_snapshot()
+
+
+def medir(funcao, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return {'mediana_ms': round(statistics.median(tempos) * 1000, 3), 'min_ms': round(min(tempos) * 1000, 3)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--database', help='nome do banco (padrão: o de app.config.database)')
+    parser.add_argument('--repeticoes', type=int, default=20)
+    args = parser.parse_args()
+
+    if args.database:
+        db.init(args.database)
+    db.connect(reuse_if_open=True)
+    try:
+        # As duas saídas devem representar o mesmo documento
+        if json.loads(caminho_antigo()) != json.loads(caminho_atual()):
+            raise SystemExit('Saídas divergentes entre os dois caminhos')
+
+        antigo = medir(caminho_antigo, args.repeticoes)
+        atual = medir(caminho_atual, args.repeticoes)
+        print(json.dumps({
+            'fundos': Carteira.select().count(),
+            'antigo': antigo,
+            'atual': atual,
+            'ganho': round(antigo['mediana_ms'] / atual['mediana_ms'], 2)
+        }, indent=2))
+    finally:
+        db.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+"""Teste de estresse de concorrência do POST /api/v1/movimentacoes.
+
+Cria um fundo, dispara APORTEs e RESGATEs concorrentes contra a API e confere
+que o saldo final da carteira bate com o replay do histórico de movimentações.
+
+    python -m bench.stress_movimentacoes --url http://localhost:5000 --workers 32 --ops 50
+"""
+import argparse
+import json
+import random
+import sys
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal, ROUND_HALF_UP
+
+
+def _request(method, url, body=None):
+    data = json.dumps(body).encode('utf-8') if body is not None else None
+    req = urllib.request.Request(url, data=data, method=method, headers={'Content-Type': 'application/json'})
+    try:
+        with urllib.request.urlopen(req) as resp:
+            return resp.status, json.loads(resp.read() or 'null')
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read() or 'null')
+
+
+def _replay(movimentacoes):
+    # Mesma regra do POST: resgate reduz valor_investido proporcionalmente
+    cotas, investido = Decimal('0'), Decimal('0')
+    for mov in sorted(movimentacoes, key=lambda m: m['id']):
+        quantidade = Decimal(str(mov['quantidade_cotas']))
+        valor = Decimal(str(mov['valor']))
+        if mov['tipo'] == 'APORTE':
+            cotas += quantidade
+            investido += valor
+        else:
+            investido = (investido - quantidade / cotas * investido).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+            cotas -= quantidade
+        if cotas < 0:
+            raise AssertionError(f"Saldo negativo após a movimentação {mov['id']}")
+    return cotas, investido
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='http://localhost:5000')
+    parser.add_argument('--workers', type=int, default=32)
+    parser.add_argument('--ops', type=int, default=50, help='operações por worker')
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    api = args.url.rstrip('/') + '/api/v1'
+    rng = random.Random(args.seed)
+
+    status, fundo = _request('POST', f'{api}/carteira', {
+        'name': 'Estresse', 'ticker': f'ST{int(time.time() * 1000) % 10 ** 8}', 'type': 'Teste', 'quoteValue': 10
+    })
+    if status != 201:
+        sys.exit(f'Falha ao criar fundo: {status} {fundo}')
+    carteira_id = fundo['id']
+    _request('POST', f'{api}/movimentacoes', {'carteira_id': carteira_id, 'tipo': 'APORTE', 'quantidade': 100, 'valor': 1000})
+
+    def worker(n):
+        resultados = []
+        local = random.Random(rng.random() + n)
+        for _ in range(args.ops):
+            body = {
+                'carteira_id': carteira_id,
+                'tipo': local.choice(['APORTE', 'RESGATE', 'RESGATE']),
+                'quantidade': local.randint(1, 20),
+                'valor': round(local.uniform(1, 500), 2)
+            }
+            resultados.append(_request('POST', f'{api}/movimentacoes', body))
+        return resultados
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        resultados = [r for lote in pool.map(worker, range(args.workers)) for r in lote]
+    duracao = time.perf_counter() - inicio
+
+    ok = [body for status, body in resultados if status == 201]
+    recusadas = [body for status, body in resultados if status == 400]
+    erros = [(status, body) for status, body in resultados if status not in (201, 400)]
+
+    # Ler o histórico completo do fundo
+    movimentacoes, cursor = [], None
+    while True:
+        url = f'{api}/movimentacoes?carteira_id={carteira_id}&limit=500' + (f'&cursor={cursor}' if cursor else '')
+        _, pagina = _request('GET', url)
+        movimentacoes += pagina['movimentacoes']
+        cursor = pagina['proximo_cursor']
+        if not cursor:
+            break
+
+    cotas, investido = _replay(movimentacoes)
+    ultima = max(ok, key=lambda m: m['id'])['saldo_atual']
+
+    print(json.dumps({
+        'carteira_id': carteira_id,
+        'operacoes': len(resultados),
+        'registradas': len(ok),
+        'recusadas_saldo_insuficiente': len(recusadas),
+        'erros': len(erros),
+        'duracao_s': round(duracao, 3),
+        'ops_por_s': round(len(resultados) / duracao, 1),
+        'saldo_api': ultima,
+        'saldo_replay': {'quantidade_cotas': float(cotas), 'valor_investido': float(investido)}
+    }, indent=2))
+
+    consistente = (
+        not erros
+        and len(movimentacoes) == len(ok) + 1
+        and Decimal(str(ultima['quantidade_cotas'])) == cotas
+        and Decimal(str(ultima['valor_investido'])) == investido
+    )
+    if not consistente:
+        sys.exit('INCONSISTENTE: saldo da carteira diverge do histórico de movimentações')
+    print('OK: saldos consistentes')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,27 @@
+import itertools
+import pytest
+from app import create_app
+
+_tickers = itertools.count(1)
+
+
+@pytest.fixture(scope='session')
+def app():
+    # Perfil local (SQLite em memória): tabelas criadas a partir dos modelos
+    return create_app({'DB_PERFIL': 'local', 'DB_LOCAL_PATH': ':memory:'})
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def fundo(client):
+    """Cria um fundo com ticker único e devolve o id."""
+    contador = next(_tickers)
+    resposta = client.post('/api/v1/carteira', json={
+        'name': f'Fundo Teste {contador}', 'ticker': f'TST{contador}', 'type': 'Ações', 'quoteValue': 10
+    })
+    assert resposta.status_code == 201
+    return resposta.get_json()['id']
@@ -0,0 +1,16 @@
+import pytest
+
+
+@pytest.mark.parametrize('corpo', [
+    '{"TST1": 0.001}',
+    '{"TST1": 0}',
+    '{"TST1": -5}',
+    '{"TST1": NaN}',
+    '{"TST1": Infinity}',
+    '{"TST1": true}',
+    '{"TST1": "10"}',
+])
+def test_valor_cota_invalido_devolve_400(client, corpo):
+    resposta = client.put('/api/v1/carteira/cotacoes', data=corpo, content_type='application/json')
+    assert resposta.status_code == 400
+    assert 'valor_cota de TST1' in resposta.get_json()['error']
@@ -0,0 +1,31 @@
+from app.resources import idempotencia
+
+
+def _enfileirar(client, fundo, chave):
+    return client.post('/api/v1/movimentacoes',
+                       json={'carteira_id': fundo, 'tipo': 'APORTE', 'valor': 100, 'quantidade': 10},
+                       headers={'Idempotency-Key': chave, 'Prefer': 'respond-async'})
+
+
+def test_repeticao_de_202_devolve_location(client, fundo):
+    original = _enfileirar(client, fundo, 'fila-location')
+    assert original.status_code == 202
+    assert original.headers['Location'] == original.get_json()['status_url']
+
+    repeticao = _enfileirar(client, fundo, 'fila-location')
+    assert repeticao.status_code == 202
+    assert repeticao.headers['Idempotent-Replayed'] == 'true'
+    assert repeticao.headers['Location'] == original.headers['Location']
+    assert repeticao.get_json() == original.get_json()
+
+
+def test_repeticao_lida_do_banco_devolve_location(client, fundo):
+    original = _enfileirar(client, fundo, 'fila-location-banco')
+    assert original.status_code == 202
+
+    # Sem o cache em memória (outro processo), a resposta vem da tabela idempotencia
+    idempotencia._respostas.delete('/api/v1/movimentacoes:fila-location-banco')
+    repeticao = _enfileirar(client, fundo, 'fila-location-banco')
+    assert repeticao.status_code == 202
+    assert repeticao.headers['Idempotent-Replayed'] == 'true'
+    assert repeticao.headers['Location'] == original.headers['Location']
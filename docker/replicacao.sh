@@ -0,0 +1,4 @@
+#!/bin/bash
+# Libera conexões de replicação no primário (usadas pelo serviço database-replica)
+set -e
+echo "host replication all all scram-sha-256" >> "$PGDATA/pg_hba.conf"
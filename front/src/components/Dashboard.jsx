@@ -3,7 +3,8 @@ import { useEffect } from 'react';
 import { useDispatch, useSelector } from 'react-redux';
 import { Container, Typography, Paper, Table, TableBody, TableCell, TableContainer, TableHead, TableRow, CircularProgress, Alert } from '@mui/material';
 import styled from '@emotion/styled';
-import { fetchCarteira } from '../store/carteiraSlice';
+import { fetchCarteira, aplicarEventoCarteira } from '../store/carteiraSlice';
+import { subscribeCarteiraEventos } from '../services/api';
 
 // Estilizações dos componentes
 const StyledContainer = styled(Container)`
@@ -75,6 +76,12 @@ const Dashboard = () => {
     }
   }, [dispatch, loading]);
 
+  // Recebe as alterações da carteira por SSE em vez de buscar o snapshot de novo
+  useEffect(() => subscribeCarteiraEventos({
+    onDelta: (evento) => dispatch(aplicarEventoCarteira(evento)),
+    onRecarregar: () => dispatch(fetchCarteira()),
+  }), [dispatch]);
+
   // Exibe loading enquanto carrega dados
   if (loading === 'loading') {
     return (
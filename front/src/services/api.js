@@ -12,6 +12,25 @@ const apiClient = axios.create({
 export const getCarteiraData = () => apiClient.get('/carteira');
 export const createCarteiraItem = (data) => apiClient.post('/carteira', data);
 
+// Stream (SSE) de alterações da carteira; o navegador reconecta sozinho enviando o Last-Event-ID.
+// Retorna uma função para encerrar o stream.
+export const subscribeCarteiraEventos = ({ onDelta, onRecarregar }) => {
+  const source = new EventSource(`${apiClient.defaults.baseURL}/carteira/eventos`);
+  // Na retomada o servidor reenvia alguns eventos anteriores ao Last-Event-ID: ignora os já vistos
+  const vistos = new Set();
+  const novo = (event) => {
+    if (vistos.has(event.lastEventId)) return false;
+    vistos.add(event.lastEventId);
+    if (vistos.size > 1000) vistos.delete(vistos.values().next().value);
+    return true;
+  };
+  const delta = (event) => novo(event) && onDelta(JSON.parse(event.data));
+  source.addEventListener('movimentacao', delta);
+  source.addEventListener('fundo', delta);
+  source.addEventListener('recarregar', (event) => novo(event) && onRecarregar());
+  return () => source.close();
+};
+
 // Movimentacoes Endpoints
 export const createMovimentacaoItem = (data) => apiClient.post('/movimentacoes', data);
 
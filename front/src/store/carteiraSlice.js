@@ -39,6 +39,14 @@ export const addFundo = createAsyncThunk(
   }
 );
 
+// Totais da carteira a partir da lista de fundos, em centavos para não acumular erro de float
+const somar = (fundos, campo) => fundos.reduce((total, fundo) => total + Math.round(fundo[campo] * 100), 0) / 100;
+const calcularResumo = (fundos) => ({
+  invested: somar(fundos, 'amount'),
+  marketValue: somar(fundos, 'marketValue'),
+  unrealizedPnl: somar(fundos, 'unrealizedPnl'),
+});
+
 // Estado inicial do slice
 const initialState = {
   // Dados da carteira
@@ -71,13 +79,32 @@ const carteiraSlice = createSlice({
       state.addFundoStatus = 'idle'; // 'idle' | 'loading' | 'succeeded' | 'failed'
       state.addFundoError = null;
       state.lastAddedFundo = null;
+    },
+
+    /**
+     * Reducer que aplica um evento do stream da carteira
+     * - Atualiza (ou inclui) o fundo alterado
+     * - Recalcula os totais a partir da lista de fundos (o evento não traz totais)
+     * - Inclui a nova movimentação no topo das recentes
+     */
+    aplicarEventoCarteira: (state, action) => {
+      const { fund, transaction } = action.payload;
+      state.portfolio = [...state.portfolio.filter((item) => item.id !== fund.id), fund]
+        .sort((a, b) => a.fundName.localeCompare(b.fundName));
+      state.portfolioSummary = calcularResumo(state.portfolio);
+      if (transaction && !state.recentTransactions.some((item) => item.id === transaction.id)) {
+        state.recentTransactions = [transaction, ...state.recentTransactions].slice(0, 5);
+      }
     }
   },
   extraReducers: (builder) => {
     builder
       // Casos para fetchCarteira
       .addCase(fetchCarteira.pending, (state) => {
-        state.loading = 'loading';
+        // Recarregamentos com dados já exibidos não voltam para o spinner
+        if (state.loading !== 'succeeded') {
+          state.loading = 'loading';
+        }
         state.error = null;
       })
       .addCase(fetchCarteira.fulfilled, (state, action) => {
@@ -111,5 +138,5 @@ const carteiraSlice = createSlice({
 });
 
 // Exporta a action e o reducer
-export const { resetAddFundoStatus } = carteiraSlice.actions;
+export const { resetAddFundoStatus, aplicarEventoCarteira } = carteiraSlice.actions;
 export default carteiraSlice.reducer;
\ No newline at end of file
@@ -11,5 +11,5 @@ FROM carteira;
 SELECT m.data_operacao, c.nome AS fundo, m.tipo, m.valor, m.quantidade_cotas
 FROM movimentacoes m
 JOIN carteira c ON m.carteira_id = c.id
-ORDER BY m.data_operacao DESC
+ORDER BY m.data_operacao DESC, m.id DESC
 LIMIT 5;
\ No newline at end of file
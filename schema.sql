@@ -11,18 +11,125 @@ CREATE TABLE carteira (
     atualizado_em TIMESTAMP NOT NULL DEFAULT NOW()
 );
 
--- Criação da tabela movimentacoes
+-- Criação da tabela movimentacoes, particionada por data_operacao (uma partição por período).
+-- Sem partição default: com ela o planner não consegue ler as partições em ordem (Append ordenado)
+-- para ORDER BY data_operacao DESC, id DESC LIMIT n e faz um Merge Append sobre todas. Por isso as
+-- partições precisam existir antes das datas gravadas (app.jobs.particoes cria os próximos meses)
 CREATE TABLE movimentacoes (
-    id SERIAL PRIMARY KEY,
+    id SERIAL,
     carteira_id INTEGER NOT NULL REFERENCES carteira(id),
     data_operacao DATE NOT NULL DEFAULT CURRENT_DATE,
     tipo VARCHAR(10) NOT NULL CHECK (tipo IN ('APORTE', 'RESGATE')),
     valor DECIMAL(10,2) NOT NULL CHECK (valor > 0),
     quantidade_cotas DECIMAL(10,2) NOT NULL CHECK (quantidade_cotas > 0),
-    criado_em TIMESTAMP NOT NULL DEFAULT NOW()
-);
+    -- Saldo do fundo logo após a movimentação, na ordem (data_operacao, id)
+    saldo_cotas DECIMAL(10,2) NOT NULL,
+    saldo_investido DECIMAL(10,2) NOT NULL,
+    criado_em TIMESTAMP NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (id, data_operacao)
+) PARTITION BY RANGE (data_operacao);
 
 -- Índices para otimização
 CREATE INDEX idx_carteira_ticker ON carteira(ticker);
+
+-- Busca de fundos (GET /api/v1/carteira/search): prefixo em minúsculas e semelhança por trigramas
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE INDEX idx_carteira_nome_prefixo ON carteira(lower(nome) text_pattern_ops);
+CREATE INDEX idx_carteira_ticker_prefixo ON carteira(lower(ticker) text_pattern_ops);
+CREATE INDEX idx_carteira_nome_trgm ON carteira USING gin (nome gin_trgm_ops);
+CREATE INDEX idx_carteira_ticker_trgm ON carteira USING gin (ticker gin_trgm_ops);
 CREATE INDEX idx_movimentacoes_carteira_id ON movimentacoes(carteira_id);
-CREATE INDEX idx_movimentacoes_data_operacao ON movimentacoes(data_operacao);
\ No newline at end of file
+CREATE INDEX idx_movimentacoes_data_operacao ON movimentacoes(data_operacao);
+
+-- Histórico paginado por chave (data_operacao DESC, id DESC), com e sem filtro por carteira;
+-- o segundo índice também responde o saldo de um fundo numa data (última movimentação até ela)
+CREATE INDEX idx_movimentacoes_data_operacao_id ON movimentacoes(data_operacao DESC, id DESC);
+CREATE INDEX idx_movimentacoes_carteira_data_operacao_id ON movimentacoes(carteira_id, data_operacao DESC, id DESC);
+
+-- Cria a partição de `meses` meses que contém `data` (movimentacoes_pAAAAMM, alinhada a jan/2000).
+-- Devolve o nome da partição criada ou NULL se ela já existir.
+CREATE OR REPLACE FUNCTION criar_particao_movimentacoes(data DATE, meses INTEGER DEFAULT 1)
+RETURNS TEXT AS $$
+DECLARE
+    decorridos INTEGER := (EXTRACT(YEAR FROM data)::INTEGER - 2000) * 12 + EXTRACT(MONTH FROM data)::INTEGER - 1;
+    inicio DATE := DATE '2000-01-01' + make_interval(months => decorridos - decorridos % meses);
+    fim DATE := inicio + make_interval(months => meses);
+    nome TEXT := 'movimentacoes_p' || to_char(inicio, 'YYYYMM');
+BEGIN
+    IF to_regclass(nome) IS NOT NULL THEN
+        RETURN NULL;
+    END IF;
+    EXECUTE format('CREATE TABLE %I PARTITION OF movimentacoes FOR VALUES FROM (%L) TO (%L)', nome, inicio, fim);
+    RETURN nome;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Cria as partições que faltam para cobrir o intervalo [de, ate]
+CREATE OR REPLACE FUNCTION criar_particoes_movimentacoes(de DATE, ate DATE, meses INTEGER DEFAULT 1)
+RETURNS SETOF TEXT AS $$
+DECLARE
+    data DATE := date_trunc('month', de);
+    nome TEXT;
+BEGIN
+    WHILE data <= ate LOOP
+        nome := criar_particao_movimentacoes(data, meses);
+        IF nome IS NOT NULL THEN
+            RETURN NEXT nome;
+        END IF;
+        data := data + INTERVAL '1 month';
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Partições do último ano e dos próximos três meses (as seguintes são criadas por app.jobs.particoes)
+SELECT criar_particoes_movimentacoes((CURRENT_DATE - INTERVAL '12 months')::DATE, (CURRENT_DATE + INTERVAL '3 months')::DATE);
+
+-- Saldo de fim de dia de cada fundo, mantido a cada movimentação (série histórica)
+CREATE TABLE carteira_diaria (
+    carteira_id INTEGER NOT NULL REFERENCES carteira(id),
+    data DATE NOT NULL,
+    quantidade_cotas DECIMAL(10,2) NOT NULL,
+    valor_investido DECIMAL(10,2) NOT NULL,
+    atualizado_em TIMESTAMP NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (carteira_id, data)
+);
+
+-- Respostas de POSTs com Idempotency-Key, para repetições não serem reprocessadas
+CREATE TABLE idempotencia (
+    chave VARCHAR(255) NOT NULL,
+    rota VARCHAR(100) NOT NULL,
+    hash_requisicao CHAR(64) NOT NULL,
+    status_code INTEGER,
+    resposta TEXT,
+    -- Cabeçalhos da resposta original (JSON), devolvidos nas repetições (ex.: Location do 202)
+    cabecalhos TEXT,
+    criado_em TIMESTAMP NOT NULL DEFAULT NOW(),
+    expira_em TIMESTAMP NOT NULL,
+    PRIMARY KEY (rota, chave)
+);
+
+-- Limpeza periódica das chaves expiradas
+CREATE INDEX idx_idempotencia_expira_em ON idempotencia(expira_em);
+
+-- Fila durável do modo assíncrono do POST /api/v1/movimentacoes
+CREATE TABLE fila_movimentacoes (
+    id BIGSERIAL PRIMARY KEY,
+    carteira_id INTEGER NOT NULL REFERENCES carteira(id),
+    tipo VARCHAR(10) NOT NULL CHECK (tipo IN ('APORTE', 'RESGATE')),
+    valor DECIMAL(10,2) NOT NULL CHECK (valor > 0),
+    quantidade_cotas DECIMAL(10,2) NOT NULL CHECK (quantidade_cotas > 0),
+    status VARCHAR(10) NOT NULL DEFAULT 'PENDENTE' CHECK (status IN ('PENDENTE', 'CONCLUIDA', 'REJEITADA')),
+    erro TEXT,
+    movimentacao_id INTEGER,
+    criado_em TIMESTAMP NOT NULL DEFAULT NOW(),
+    processado_em TIMESTAMP
+);
+
+CREATE INDEX idx_fila_movimentacoes_pendentes ON fila_movimentacoes(id) WHERE status = 'PENDENTE';
+-- Eventos de alteração da carteira, publicados por NOTIFY e relidos pelo SSE a partir do Last-Event-ID
+CREATE TABLE eventos_carteira (
+    id BIGSERIAL PRIMARY KEY,
+    tipo VARCHAR(20) NOT NULL,
+    dados TEXT NOT NULL,
+    criado_em TIMESTAMP NOT NULL DEFAULT NOW()
+);